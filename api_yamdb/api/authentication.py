@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.constant import (ROLE_CLAIM,
+                          SUPERUSER_CLAIM,
+                          TOKEN_VERSION_CACHE_KEY,
+                          TOKEN_VERSION_CACHE_TIMEOUT,
+                          TOKEN_VERSION_CLAIM)
+from users.models import User
+
+
+def get_access_token(user):
+    """Выпускает токен с ролью пользователя и версией токенов."""
+    token = AccessToken.for_user(user)
+    token[ROLE_CLAIM] = user.role
+    token[SUPERUSER_CLAIM] = user.is_superuser
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def get_token_version(user_id):
+    """Возвращает текущую версию токенов пользователя через кэш."""
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        cache.set(key, version, TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Пользователь, построенный по данным токена.
+
+    Роль и признак суперпользователя берутся из токена, а запись
+    пользователя загружается из базы только при обращении к другим полям.
+    """
+
+    def __init__(self, user_id, role, is_superuser):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            role=role,
+            is_superuser=is_superuser,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __bool__(self):
+        return True
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя из базы."""
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = get_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен',
+                code='user_not_found'
+            )
+        if validated_token.get(TOKEN_VERSION_CLAIM) != version:
+            raise AuthenticationFailed(
+                'Токен устарел', code='token_outdated'
+            )
+        return ClaimsUser(
+            user_id,
+            validated_token[ROLE_CLAIM],
+            validated_token.get(SUPERUSER_CLAIM, False)
+        )
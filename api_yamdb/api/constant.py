@@ -12,3 +12,37 @@ MAX_LEN_USERNAME = 150
 MAX_LEN_EMAIL = 254
 MAX_LEN_CHARFIELD = 256
 MAX_LEN_OUT = 20
+FILTER_SEPARATOR = ','
+FILTER_CONTAINS = 'contains'
+FILTER_EXACT = 'exact'
+FILTER_ANY = 'or'
+FILTER_ALL = 'and'
+EMAIL_BATCH_SIZE = 100
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_DELAY = 60
+EMAIL_POLL_INTERVAL = 5
+EMAIL_CLAIM_TIMEOUT = 300
+ROLE_CLAIM = 'role'
+SUPERUSER_CLAIM = 'is_superuser'
+TOKEN_VERSION_CLAIM = 'token_version'
+TOKEN_VERSION_CACHE_KEY = 'token_version:{user_id}'
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+CATEGORIES_VERSION = 'categories'
+GENRES_VERSION = 'genres'
+TITLES_VERSION = 'titles'
+MAX_LEN_VERSION_NAME = 32
+TITLE_VERSION_CACHE_KEY = 'title_version:{title_id}'
+ALL_TITLES_VERSION_CACHE_KEY = 'title_version:all'
+RESPONSE_CACHE_KEY = 'response:{name}:{key}'
+RESPONSE_CACHE_TIMEOUT = 300
+COUNT_CACHE_KEY = 'count:{key}'
+COUNT_CACHE_TIMEOUT = 60
+COUNT_VERSION_CACHE_KEY = 'count_version:{model}'
+EXACT_COUNT_THRESHOLD = 1000
+FACETS_QUERY_PARAM = 'facets'
+MAX_BULK_TITLES = 1000
+IDS_QUERY_PARAM = 'ids'
+MAX_BATCH_IDS = 100
+MAX_ID = 2 ** 63 - 1
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
@@ -0,0 +1,66 @@
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+
+
+class RegistrySlugField(serializers.Field):
+    """
+    Поле категории или жанра, работающее через реестр в памяти.
+
+    Принимает слаг и возвращает объект из реестра, а при выводе отдает
+    словарь с названием и слагом. Снимок реестра берется один раз на
+    корневой сериализатор, то есть один раз на запрос.
+    """
+
+    default_error_messages = (
+        serializers.SlugRelatedField.default_error_messages
+    )
+
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        super().__init__(**kwargs)
+
+    def get_snapshot(self):
+        snapshots = self.root.__dict__.setdefault('_registry_snapshots', {})
+        if self.registry not in snapshots:
+            snapshots[self.registry] = self.registry.snapshot()
+        return snapshots[self.registry]
+
+    def get_attribute(self, instance):
+        return instance.serializable_value(self.source)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        obj = self.get_snapshot().get_by_slug(data)
+        if obj is None:
+            self.fail(
+                'does_not_exist', slug_name='slug', value=smart_str(data)
+            )
+        return obj
+
+    def to_representation(self, value):
+        return self.get_snapshot().represent(value)
+
+
+class RegistrySlugListField(serializers.ListField):
+    """
+    Список жанров произведения через реестр в памяти.
+
+    Идентификаторы берутся из предзагруженных связей `link_name`, поэтому
+    таблица жанров при выводе не читается.
+    """
+
+    def __init__(self, registry, link_name, link_field, **kwargs):
+        self.link_name = link_name
+        self.link_field = link_field
+        super().__init__(child=RegistrySlugField(registry), **kwargs)
+
+    def get_attribute(self, instance):
+        return [getattr(link, self.link_field)
+                for link in getattr(instance, self.link_name).all()]
+
+    def to_representation(self, data):
+        return sorted(
+            (item for item in super().to_representation(data) if item),
+            key=lambda item: (item['name'], item['slug'])
+        )
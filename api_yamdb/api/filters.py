@@ -1,18 +1,133 @@
+from django.db.models import (Case, Exists, F, IntegerField, OuterRef, Q,
+                              Value, When)
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
 
-from reviews.models import Title
+from api.constant import (FILTER_ALL,
+                          FILTER_ANY,
+                          FILTER_CONTAINS,
+                          FILTER_EXACT,
+                          FILTER_SEPARATOR,
+                          IDS_QUERY_PARAM,
+                          MAX_BATCH_IDS,
+                          MAX_ID)
+from reviews.models import GenreTitle, Title
+
+# Сортировки списка произведений. Второе поле делает порядок
+# однозначным, произведения без оценок идут в конце.
+TITLE_ORDERING = {
+    'rating': (F('rating').asc(nulls_last=True), 'id'),
+    '-rating': (F('rating').desc(nulls_last=True), '-id'),
+    'year': ('year', 'id'),
+    '-year': ('-year', '-id'),
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+}
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    """
+    Фильтр произведений.
+
+    Жанры и категории передаются слагами через запятую. Параметр `match`
+    задает сравнение слагов: `contains` (по умолчанию) ищет вхождение,
+    `exact` — точное совпадение по уникальному индексу. Параметр `genre_op`
+    определяет, должно ли произведение иметь любой (`or`) или все (`and`)
+    из перечисленных жанров. Параметр `ordering` сортирует по рейтингу,
+    году или названию (с `-` — по убыванию), `min_rating` оставляет
+    произведения с рейтингом не ниже заданного. Параметр `ids` выбирает
+    произведения по списку id через запятую в переданном порядке.
+    """
+
+    genre = filters.CharFilter(method='filter_genre')
+    category = filters.CharFilter(method='filter_category')
+    match = filters.ChoiceFilter(
+        choices=((FILTER_CONTAINS, FILTER_CONTAINS),
+                 (FILTER_EXACT, FILTER_EXACT)),
+        method='filter_options'
     )
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
+    genre_op = filters.ChoiceFilter(
+        choices=((FILTER_ANY, FILTER_ANY), (FILTER_ALL, FILTER_ALL)),
+        method='filter_options'
     )
+    min_rating = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in TITLE_ORDERING],
+        method='filter_ordering'
+    )
+    ids = filters.CharFilter(method='filter_ids')
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'genre', 'category')
+
+    @property
+    def exact(self):
+        return self.form.cleaned_data.get('match') == FILTER_EXACT
+
+    @staticmethod
+    def split(value):
+        return [slug for slug in (
+            part.strip() for part in value.split(FILTER_SEPARATOR)
+        ) if slug]
+
+    def slug_condition(self, field_name, slugs):
+        if self.exact:
+            return Q(**{f'{field_name}__in': slugs})
+        condition = Q()
+        for slug in slugs:
+            condition |= Q(**{f'{field_name}__icontains': slug})
+        return condition
+
+    def filter_options(self, queryset, name, value):
+        return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*TITLE_ORDERING[value])
+
+    def filter_ids(self, queryset, name, value):
+        try:
+            ids = [int(pk) for pk in self.split(value)]
+        except ValueError:
+            raise ValidationError(
+                {IDS_QUERY_PARAM: ['Передайте id произведений через запятую.']}
+            )
+        if any(pk > MAX_ID for pk in ids):
+            raise ValidationError({IDS_QUERY_PARAM: [
+                f'id произведения не может быть больше {MAX_ID}.'
+            ]})
+        # Неположительных id не бывает: такие значения пропускаются, как
+        # и несуществующие.
+        ids = list(dict.fromkeys(pk for pk in ids if pk > 0))
+        if not ids:
+            return queryset.none()
+        if len(ids) > MAX_BATCH_IDS:
+            raise ValidationError({IDS_QUERY_PARAM: [
+                f'Не больше {MAX_BATCH_IDS} id за запрос.'
+            ]})
+        return queryset.filter(pk__in=ids).order_by(Case(
+            *(When(pk=pk, then=Value(index))
+              for index, pk in enumerate(ids)),
+            output_field=IntegerField()
+        ))
+
+    def filter_genre(self, queryset, name, value):
+        slugs = self.split(value)
+        if not slugs:
+            return queryset
+        links = GenreTitle.objects.filter(title=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_op') != FILTER_ALL:
+            return queryset.filter(Exists(
+                links.filter(self.slug_condition('genre__slug', slugs))
+            ))
+        for slug in slugs:
+            queryset = queryset.filter(Exists(
+                links.filter(self.slug_condition('genre__slug', [slug]))
+            ))
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        slugs = self.split(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(self.slug_condition('category__slug', slugs))
@@ -0,0 +1,103 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.readers import ValuesReader
+from api.renderers import FastJSONRenderer
+from api.serializers import (CategorySerializer, CommentSerializer,
+                             GenreSerializer, ReviewSerializer,
+                             TitleSerializer)
+from reviews.models import Category, Comment, Genre, Review, Title
+
+BENCHMARK_ROWS = 1000
+BENCHMARK_REPEAT = 3
+
+# Разделы: название, сериализатор и выборка, как в списках API.
+SECTIONS = (
+    ('titles', TitleSerializer,
+     Title.objects.prefetch_related('genretitles')),
+    ('reviews', ReviewSerializer, Review.objects.select_related('author')),
+    ('comments', CommentSerializer, Comment.objects.select_related('author')),
+    ('genres', GenreSerializer, Genre.objects.all()),
+    ('categories', CategorySerializer, Category.objects.all()),
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнение скорости вывода списков сериализаторами и '
+            'через строки .values()')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=BENCHMARK_ROWS,
+            help='Количество строк каждого раздела',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=BENCHMARK_REPEAT,
+            help='Количество повторов, учитывается лучший',
+        )
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+        for name, serializer_class, queryset in SECTIONS:
+            queryset = queryset[:options['rows']]
+
+            def serialize():
+                return renderer.render(
+                    serializer_class(list(queryset.all()), many=True).data
+                )
+
+            def read():
+                reader = ValuesReader(serializer_class())
+                return renderer.render(
+                    reader.represent(reader.values(queryset))
+                )
+
+            before, expected = self.measure(serialize, options['repeat'])
+            after, content = self.measure(read, options['repeat'])
+            if content != expected:
+                raise CommandError(
+                    f'{name}: вывод через .values() отличается от вывода '
+                    'сериализатора'
+                )
+            reader = ValuesReader(serializer_class())
+            data = reader.represent(reader.values(queryset))
+            render, _ = self.measure(
+                lambda: renderer.render(data), options['repeat']
+            )
+            fast_render, content = self.measure(
+                lambda: fast_renderer.render(data), options['repeat']
+            )
+            if content != expected:
+                raise CommandError(
+                    f'{name}: вывод FastJSONRenderer отличается от вывода '
+                    'JSONRenderer'
+                )
+            rows = len(queryset)
+            if not rows:
+                self.stdout.write(f'{name}: нет данных')
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {rows} строк, сериализатор '
+                f'{rows / before:.0f} строк/с, .values() '
+                f'{rows / after:.0f} строк/с ({before / after:.1f}x), '
+                f'JSONRenderer {rows / render:.0f} строк/с, '
+                f'FastJSONRenderer {rows / fast_render:.0f} строк/с'
+            ))
+
+    @staticmethod
+    def measure(function, repeat):
+        """Лучшее время выполнения и результат функции."""
+        best = None
+        for _ in range(max(repeat, 1)):
+            start = perf_counter()
+            result = function()
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -1,18 +1,356 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import filters, viewsets
-from rest_framework.mixins import (CreateModelMixin,
-                                   DestroyModelMixin,
-                                   ListModelMixin)
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.mixins import CreateModelMixin, DestroyModelMixin
 
+from api.constant import (FACETS_QUERY_PARAM,
+                          FIELDS_QUERY_PARAM,
+                          FILTER_SEPARATOR,
+                          OMIT_QUERY_PARAM,
+                          RESPONSE_CACHE_KEY,
+                          RESPONSE_CACHE_TIMEOUT)
+from api.pagination import CachedCountPagination
 from api.permissions import AdminOrReadOnlyPermissions
+from api.readers import ValuesReader
+from reviews.versions import get_version, get_versions
+
+
+def split_param(value):
+    """Разбивает значение параметра запроса на непустые части."""
+    return [part for part in (
+        part.strip() for part in value.split(FILTER_SEPARATOR)
+    ) if part]
+
+
+class ConditionalGetMixin:
+    """
+    Ответы на условные GET-запросы по версии раздела каталога.
+
+    ETag строится по версии раздела `version_name`, формату ответа и
+    самому запросу: значению lookup для детального ответа и параметрам
+    для списка. 304 возвращается после проверки запроса (поиска объекта
+    или разбора фильтров), но до выборки страницы и сериализации.
+    Last-Modified хранит время с точностью до секунды, поэтому один
+    If-Modified-Since без ETag к 304 не приводит.
+    """
+
+    version_name = None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, self.check_list_request, request, *args, **kwargs
+        )
+
+    def check_list_request(self):
+        """Разбирает фильтры, чтобы ошибочный запрос получил 400, а не 304."""
+        self.filter_queryset(self.get_queryset())
+
+    def get_etag(self, version):
+        request = self.request
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = md5(f'{lookup}?{query}'.encode()).hexdigest()
+        return (f'"{self.version_name}-{version}-{digest}-'
+                f'{request.accepted_renderer.format}"')
+
+    def conditional_response(self, handler, check, request, *args, **kwargs):
+        version, modified = get_version(self.version_name)
+        etag = self.get_etag(version)
+        response = None
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            check()
+            response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified.timestamp())
+        return response
+
+
+class CachedResponseMixin:
+    """
+    Кэш готовых JSON-ответов list и retrieve.
+
+    Ключ ответа строится по версиям разделов каталога из
+    `list_cache_versions` или `detail_cache_versions`, версии объекта из
+    `get_object_cache_version` и параметрам запроса, поэтому при изменении
+    данных старые ответы просто перестают запрашиваться. При попадании в кэш
+    возвращаются сохраненные байты без выборки и сериализации.
+    """
+
+    cache_name = None
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+    list_cache_versions = None
+    detail_cache_versions = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [name for name in ('cache_name',
+                                     'list_cache_versions',
+                                     'detail_cache_versions')
+                   if getattr(cls, name) is None]
+        if missing:
+            raise ImproperlyConfigured(
+                f'{cls.__name__}: не заданы {", ".join(missing)} '
+                'для кэша ответов.'
+            )
+
+    def get_object_cache_version(self, lookup):
+        """Версия отдельного объекта, если она ведется."""
+        return None
+
+    def get_list_cache_version(self):
+        return sorted(get_versions(*self.list_cache_versions).items())
+
+    def get_detail_cache_version(self):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return (
+            lookup,
+            self.get_object_cache_version(lookup),
+            sorted(get_versions(*self.detail_cache_versions).items()),
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, self.get_list_cache_version,
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, self.get_detail_cache_version,
+            request, *args, **kwargs
+        )
+
+    def get_response_cache_key(self, version):
+        # Тип ответа учитывает параметры Accept (например, indent).
+        media_type = self.request.accepted_media_type
+        query = self.request.query_params.urlencode()
+        key = md5(f'{version}?{query}|{media_type}'.encode()).hexdigest()
+        return RESPONSE_CACHE_KEY.format(name=self.cache_name, key=key)
+
+    def cached_response(self, handler, get_version, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(get_version())
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key,
+                    (rendered.content, rendered['Content-Type']),
+                    self.cache_timeout
+                )
+            )
+        return response
+
+
+class FacetMixin:
+    """
+    Сгруппированные количества объектов для списка.
+
+    Параметр `facets` перечисляет через запятую имена из `facets`. Для
+    каждого фасета метод `get_<имя>_facet` выполняет один агрегирующий
+    запрос по отфильтрованной выборке, а результат добавляется в ответ
+    под ключом `facets`.
+    """
+
+    facets = ()
+
+    def get_requested_facets(self):
+        names = split_param(
+            self.request.query_params.get(FACETS_QUERY_PARAM, '')
+        )
+        unknown = [name for name in names if name not in self.facets]
+        if unknown:
+            raise ValidationError({FACETS_QUERY_PARAM: [
+                f'Неизвестный фасет: {name}.' for name in unknown
+            ]})
+        return list(dict.fromkeys(names))
+
+    def list(self, request, *args, **kwargs):
+        names = self.get_requested_facets()
+        response = super().list(request, *args, **kwargs)
+        if names and isinstance(response.data, dict):
+            queryset = self.filter_queryset(
+                self.get_queryset()
+            ).prefetch_related(None).order_by()
+            response.data[FACETS_QUERY_PARAM] = {
+                name: getattr(self, f'get_{name}_facet')(queryset)
+                for name in names
+            }
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    Выборочные поля ответа по параметрам `fields` и `omit`.
+
+    Для безопасных запросов лишние поля убираются из сериализатора, а из
+    выборки — их столбцы (через defer), связи select_related и
+    предзагрузки. Поля из `sparse_required_fields` нужны представлению
+    (например, для курсора пагинации) и из выборки не убираются.
+    """
+
+    sparse_required_fields = ()
+
+    def get_sparse_params(self):
+        """Списки полей из `fields` и `omit` безопасного запроса."""
+        request = self.request
+        if request is None or request.method not in SAFE_METHODS:
+            return [], []
+        return (
+            split_param(request.query_params.get(FIELDS_QUERY_PARAM, '')),
+            split_param(request.query_params.get(OMIT_QUERY_PARAM, '')),
+        )
+
+    def get_sparse_fieldset(self, fields):
+        """Возвращает имена оставляемых полей или None."""
+        only, omit = self.get_sparse_params()
+        if not only and not omit:
+            return None
+        errors = {}
+        for param, names in ((FIELDS_QUERY_PARAM, only),
+                             (OMIT_QUERY_PARAM, omit)):
+            unknown = [name for name in names if name not in fields]
+            if unknown:
+                errors[param] = [
+                    f'Неизвестное поле: {name}.' for name in unknown
+                ]
+        if errors:
+            raise ValidationError(errors)
+        return {name for name in fields
+                if (not only or name in only) and name not in omit}
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if not any(self.get_sparse_params()):
+            return serializer
+        fields = getattr(serializer, 'child', serializer).fields
+        keep = self.get_sparse_fieldset(fields)
+        if keep is not None:
+            for name in list(fields):
+                if name not in keep:
+                    fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not any(self.get_sparse_params()):
+            return queryset
+        fields = super().get_serializer().fields
+        keep = self.get_sparse_fieldset(fields)
+        if keep is None:
+            return queryset
+        sources = set(self.sparse_required_fields)
+        for name in keep:
+            field = fields[name]
+            sources.add(field.source.split('.')[0])
+            sources.add(getattr(field, 'link_name', None))
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict) and set(select_related) - sources:
+            queryset = queryset.select_related(None)
+            needed = [name for name in select_related if name in sources]
+            if needed:
+                queryset = queryset.select_related(*needed)
+        lookups = queryset._prefetch_related_lookups
+        needed = [lookup for lookup in lookups
+                  if getattr(lookup, 'prefetch_to', lookup) in sources]
+        if len(needed) != len(lookups):
+            queryset = queryset.prefetch_related(None).prefetch_related(
+                *needed
+            )
+        return queryset.defer(*(
+            field.name for field in queryset.model._meta.concrete_fields
+            if not field.primary_key and field.name not in sources
+        ))
+
+
+class ValuesListMixin:
+    """
+    Список через ValuesReader: страница выбирается строками `.values()`
+    и выводится без создания объектов моделей и привязки полей на каждую
+    строку. Создание, изменение и детальные ответы используют обычный
+    сериализатор. Поля из `sparse_required_fields` добавляются к выборке
+    для пагинации.
+    """
+
+    sparse_required_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.values_response(
+            self.filter_queryset(self.get_queryset())
+        )
+
+    def values_response(self, queryset):
+        reader = ValuesReader(self.get_serializer())
+        rows = reader.values(queryset, *self.sparse_required_fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response(reader.represent(rows))
+
+
+class NestedListMixin:
+    """
+    Список вложенных объектов без отдельного запроса к родителю.
+
+    Родитель — объект `parent_model`, найденный по `parent_lookup`
+    ({поле родителя: имя параметра URL}). Выборка страницы уже
+    отфильтрована по родителю, поэтому его существование проверяется
+    только для пустой страницы, чтобы отличить пустой список от 404.
+    """
+
+    parent_model = None
+    parent_lookup = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.parent_model is None or not cls.parent_lookup:
+            raise ImproperlyConfigured(
+                f'{cls.__name__}: не заданы parent_model и parent_lookup.'
+            )
+
+    def get_parent_queryset(self):
+        return self.parent_model.objects.filter(**{
+            field: self.kwargs[kwarg]
+            for field, kwarg in self.parent_lookup.items()
+        })
+
+    def get_parent(self):
+        return get_object_or_404(self.get_parent_queryset())
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        data = response.data
+        if isinstance(data, dict):
+            data = data.get('results')
+        if not data:
+            self.get_parent()
+        return response
 
 
-class GenreCategoryMixin(CreateModelMixin,
-                         ListModelMixin,
+class GenreCategoryMixin(ConditionalGetMixin,
+                         CreateModelMixin,
+                         ValuesListMixin,
                          DestroyModelMixin,
                          viewsets.GenericViewSet):
     filter_backends = (filters.SearchFilter,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
     permission_classes = (AdminOrReadOnlyPermissions,)
     lookup_field = 'slug'
     search_fields = ('name',)
@@ -0,0 +1,107 @@
+from hashlib import md5
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from rest_framework.pagination import (CursorPagination,
+                                       LimitOffsetPagination,
+                                       PageNumberPagination)
+
+from api.constant import (COUNT_CACHE_KEY,
+                          COUNT_CACHE_TIMEOUT,
+                          EXACT_COUNT_THRESHOLD)
+from reviews.versions import get_count_version
+
+
+class CachedCountMixin:
+    """
+    Количество объектов для пагинации без COUNT(*) на каждую страницу.
+
+    Количество берется из денормализованного счетчика, если представление
+    определяет `get_stored_count`. Отфильтрованные выборки считаются точно,
+    пока их размер не превышает `exact_count_threshold`. Остальные значения
+    берутся из кэша: ключ зависит от запроса и версии количества строк
+    модели, а запись живет не дольше `count_cache_timeout` секунд.
+    """
+
+    count_cache_timeout = COUNT_CACHE_TIMEOUT
+    exact_count_threshold = EXACT_COUNT_THRESHOLD
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        get_stored_count = getattr(self.view, 'get_stored_count', None)
+        if get_stored_count is not None:
+            count = get_stored_count()
+            if count is not None:
+                return count
+        if queryset.query.where:
+            count = queryset[:self.exact_count_threshold + 1].count()
+            if count <= self.exact_count_threshold:
+                return count
+        version = get_count_version(queryset.model)
+        key = COUNT_CACHE_KEY.format(
+            key=md5(f'{version}:{queryset.query}'.encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+
+class CachedCountPagination(CachedCountMixin, LimitOffsetPagination):
+    """LimitOffsetPagination с кэшируемым количеством объектов."""
+
+
+class CachedCountPageNumberPagination(CachedCountMixin, PageNumberPagination):
+    """PageNumberPagination с кэшируемым количеством объектов."""
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        paginator.count = self.get_count(object_list)
+        return paginator
+
+
+class PublicationCursorPagination(CursorPagination):
+    """Курсорная пагинация по дате публикации и id."""
+
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class TopRatedCursorPagination(CursorPagination):
+    """Курсорная пагинация рейтинга произведений по индексу рейтинга."""
+
+    ordering = ('-rating', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class PublicationPagination(CachedCountPagination):
+    """
+    Пагинация отзывов и комментариев.
+
+    По умолчанию работает как CachedCountPagination. Если в запросе есть
+    параметр `cursor` (в том числе пустой), используется курсорная
+    пагинация: страница выбирается по индексу без COUNT(*) и OFFSET.
+    """
+
+    cursor_pagination_class = PublicationCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
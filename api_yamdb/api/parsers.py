@@ -0,0 +1,79 @@
+import codecs
+import re
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.settings import api_settings
+from rest_framework.utils import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Целые длиннее 19 цифр и отрицательные из 19 цифр orjson читает как
+# float, стандартный модуль — как int.
+LONG_INTEGER_RE = re.compile(r'-\d{19}|\d{20}')
+
+
+def loads(text, strict=True):
+    """
+    Разбор JSON через orjson с откатом на стандартный модуль.
+
+    Все, что orjson не принимает (NaN, числа вне диапазона, одиночные
+    суррогаты, ошибки синтаксиса), разбирается стандартным модулем,
+    поэтому результат и тексты ошибок не меняются.
+    """
+    if orjson is not None and not LONG_INTEGER_RE.search(text):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    if strict:
+        return json.loads(text)
+    return json.loads(text, parse_constant=None)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser, разбирающий тело через orjson, если он установлен."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            text = codecs.getreader(encoding)(stream).read()
+            return loads(text, self.strict)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONParser(BaseParser):
+    """
+    Парсер NDJSON.
+
+    Каждая непустая строка тела — отдельный JSON-объект, результатом
+    разбора является их список.
+    """
+
+    media_type = 'application/x-ndjson'
+    strict = api_settings.STRICT_JSON
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            lines = stream.read().decode(encoding).splitlines()
+        except ValueError as exc:
+            raise ParseError(f'NDJSON parse error - {exc}')
+        items = []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(loads(line, self.strict))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error - line {number}: {exc}')
+        return items
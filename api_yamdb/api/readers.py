@@ -0,0 +1,91 @@
+from rest_framework import serializers
+
+from api.fields import RegistrySlugField, RegistrySlugListField
+
+
+def identity(value):
+    return value
+
+
+class ValuesReader:
+    """
+    Вывод списка из строк `.values()` без создания объектов моделей.
+
+    Для каждого поля сериализатора заранее определяются столбец выборки и
+    функция преобразования — to_representation самого поля, поэтому
+    результат совпадает с выводом сериализатора. Связи полей
+    RegistrySlugListField читаются одним запросом на страницу.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.fields = []
+        self.links = []
+        for field in serializer._readable_fields:
+            self.fields.append(self.compile_field(field))
+
+    def compile_field(self, field):
+        """Возвращает имя поля, столбец строки и функцию преобразования."""
+        if isinstance(field, RegistrySlugListField):
+            relation = self.model._meta.get_field(field.link_name)
+            key = f'_{field.field_name}'
+            self.links.append((
+                key,
+                relation.related_model,
+                relation.field.attname,
+                field.link_field,
+            ))
+            return field.field_name, key, field.to_representation
+        if field.source == '*':
+            raise ValueError(
+                f'Поле `{field.field_name}` нельзя вывести из `.values()`.'
+            )
+        column = field.source.replace('.', '__')
+        if isinstance(field, serializers.SlugRelatedField):
+            return (field.field_name, f'{column}__{field.slug_field}',
+                    identity)
+        if isinstance(field, RegistrySlugField):
+            column = self.model._meta.get_field(column).attname
+        if (isinstance(field, serializers.DateTimeField)
+                and not hasattr(field, 'timezone')):
+            # Часовой пояс запроса определяется один раз, а не для
+            # каждой строки: поле создано для текущего запроса.
+            field.timezone = field.default_timezone()
+        return field.field_name, column, field.to_representation
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys(
+            [self.pk] + [column for _, column, _ in self.fields
+                         if not column.startswith('_')]
+        ))
+
+    def values(self, queryset, *extra):
+        """Выборка строк со столбцами, нужными для вывода."""
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(self.columns + list(extra))
+        )
+
+    def represent(self, rows):
+        rows = list(rows)
+        groups = []
+        if self.links and rows:
+            pks = [row[self.pk] for row in rows]
+            for key, model, owner_field, link_field in self.links:
+                grouped = {pk: [] for pk in pks}
+                for owner, value in model.objects.filter(
+                    **{f'{owner_field}__in': pks}
+                ).values_list(owner_field, link_field):
+                    grouped[owner].append(value)
+                groups.append((key, grouped))
+        result = []
+        for row in rows:
+            for key, grouped in groups:
+                row[key] = grouped[row[self.pk]]
+            item = {}
+            for name, column, convert in self.fields:
+                value = row[column]
+                item[name] = None if value is None else convert(value)
+            result.append(item)
+        return result
@@ -0,0 +1,100 @@
+import math
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson записывает показатель степени без знака и ведущего нуля
+# (1e16 вместо 1e+16, 1e-7 вместо 1e-07), а числа от 1e-5 до 1e-4 —
+# без показателя (0.00001 вместо 1e-05).
+FLOAT_EXPONENT_RE = re.compile(rb'\de[-\d]|0\.0000')
+
+# Типы, которые не могут содержать NaN и Infinity.
+FINITE_TYPES = (str, int, bool, type(None))
+
+
+def has_non_finite(value):
+    """Ищет NaN и Infinity, которые orjson молча выводит как null."""
+    if type(value) is dict:
+        items = value.values()
+    elif type(value) is list or type(value) is tuple:
+        items = value
+    elif isinstance(value, float):
+        return not math.isfinite(value)
+    elif isinstance(value, dict):
+        items = dict(value.items()).values()
+    elif isinstance(value, (list, tuple)):
+        items = list(value)
+    else:
+        return False
+    for item in items:
+        if type(item) not in FINITE_TYPES and has_non_finite(item):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, кодирующий ответ через orjson, если он установлен.
+
+    Вывод совпадает с выводом JSONRenderer байт в байт: даты, Decimal
+    и ленивые строки кодируются его JSONEncoder. Отступы, ASCII и
+    нестрогий режим, числа вне 64 бит и числа с показателем степени
+    отдаются стандартному кодировщику. NaN и Infinity orjson выводит
+    как null, поэтому при null в выводе данные проверяются и такие
+    значения, как и в JSONRenderer, приводят к ValueError.
+    """
+
+    def default(self, obj):
+        # Наследников встроенных типов orjson кодирует по внутреннему
+        # хранилищу, минуя переопределенные методы (QueryDict отдал бы
+        # списки значений, OrderedDict — порядок без move_to_end),
+        # поэтому они приводятся к базовому типу так же, как их видит json.
+        if isinstance(obj, dict):
+            return dict(obj.items())
+        if isinstance(obj, (list, tuple)):
+            return list(obj)
+        if isinstance(obj, str):
+            return str.__str__(obj)
+        if isinstance(obj, int):
+            return int(obj)
+        if isinstance(obj, float):
+            obj = float(obj)
+        else:
+            obj = self.encoder.default(obj)
+        if isinstance(obj, float) and not math.isfinite(obj):
+            # Decimal('NaN') и наследники float с NaN: отказ переводит
+            # ответ на стандартный кодировщик, который вызовет ValueError.
+            raise TypeError('Out of range float values are not JSON compliant')
+        return obj
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or not self.strict
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        self.encoder = self.encoder_class()
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_SUBCLASS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if FLOAT_EXPONENT_RE.search(content) or (
+                b'null' in content and has_non_finite(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк для JavaScript.
+        return content.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
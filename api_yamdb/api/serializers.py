@@ -1,16 +1,24 @@
 from datetime import date
 
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 
 from api.constant import (DEFAULT_SCORE,
+                          MAX_BULK_TITLES,
                           MAX_LEN_EMAIL,
                           MAX_LEN_USERNAME,
+                          TITLES_VERSION,
                           WRONGUSERNAME)
-from reviews.models import Category, Comment, Genre, Review, Title
+from api.fields import RegistrySlugField, RegistrySlugListField
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
+from reviews.registry import category_registry, genre_registry
+from reviews.versions import bump_count_version, bump_versions
 from users.models import User, user_name_validator
 
 
@@ -30,21 +38,93 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
+class TitleListSerializer(serializers.ListSerializer):
+    """
+    Массовое создание произведений.
+
+    Ошибочные элементы не прерывают загрузку: они собираются в
+    `item_errors` с индексом элемента, а остальные произведения и их связи
+    с жанрами создаются через bulk_create в одной транзакции, а версии
+    кэша сбрасываются один раз.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > MAX_BULK_TITLES:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Не больше {MAX_BULK_TITLES} произведений за запрос.'
+            ]})
+        self.item_errors = []
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.child.run_validation(item))
+            except ValidationError as exc:
+                self.item_errors.append(
+                    {'index': index, 'errors': exc.detail}
+                )
+        return validated
+
+    def create(self, validated_data):
+        titles = [
+            Title(**{key: value for key, value in attrs.items()
+                     if key != 'genre'})
+            for attrs in validated_data
+        ]
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                titles = Title.objects.bulk_create(titles)
+            elif connection.vendor == 'sqlite':
+                Title.objects.bulk_create(titles)
+                self.fetch_inserted_ids(titles)
+            else:
+                # Без возврата ключей из bulk_create id нужны для связей
+                # с жанрами, поэтому произведения сохраняются по одному.
+                for title in titles:
+                    title.save()
+            GenreTitle.objects.bulk_create([
+                GenreTitle(title=title, genre=genre)
+                for title, attrs in zip(titles, validated_data)
+                for genre in dict.fromkeys(attrs['genre'])
+            ])
+        bump_versions(TITLES_VERSION)
+        bump_count_version(Title)
+        return titles
+
+    @staticmethod
+    def fetch_inserted_ids(titles):
+        """
+        Проставляет id произведениям, вставленным bulk_create в SQLite.
+
+        После первой записи транзакция SQLite не дает писать другим
+        соединениям, а AUTOINCREMENT выдает ключи по возрастанию в порядке
+        вставки, поэтому новые строки — последние len(titles) id.
+        """
+        ids = list(Title.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(titles)])
+        for title, pk in zip(titles, reversed(ids)):
+            title.pk = pk
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для произведений."""
 
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Genre.objects.all(),
-        many=True
+    genre = RegistrySlugListField(
+        registry=genre_registry,
+        link_name='genretitles',
+        link_field='genre_id'
     )
 
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects.all()
-    )
+    category = RegistrySlugField(registry=category_registry)
 
-    rating = serializers.IntegerField(default=DEFAULT_SCORE, read_only=True)
+    rating = serializers.FloatField(default=DEFAULT_SCORE, read_only=True)
+
+    # Каждый отзыв содержит оценку, поэтому количество оценок
+    # совпадает с количеством отзывов.
+    review_count = serializers.IntegerField(source='rating_count',
+                                            read_only=True)
 
     year = serializers.IntegerField()
 
@@ -55,10 +135,12 @@ class TitleSerializer(serializers.ModelSerializer):
             'name',
             'year',
             'rating',
+            'review_count',
             'description',
             'genre',
             'category'
         )
+        list_serializer_class = TitleListSerializer
 
     def validate_year(self, value):
         year = date.today().year
@@ -66,14 +148,6 @@ class TitleSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Проверьте год выпуска.')
         return value
 
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        average_rating = instance.reviews.aggregate(Avg('score'))['score__avg']
-        ret['rating'] = average_rating
-        ret['genre'] = GenreSerializer(instance.genre.all(), many=True).data
-        ret['category'] = CategorySerializer(instance.category).data
-        return ret
-
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для работы с отзывами."""
@@ -82,17 +156,22 @@ class ReviewSerializer(serializers.ModelSerializer):
                                           slug_field='username')
 
     class Meta:
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comment_count')
+        read_only_fields = ('comment_count',)
         model = Review
 
-    def validate(self, value):
-        if self.context['request'].method in ['POST']:
-            if Review.objects.filter(
-                    author=self.context.get('request').user,
-                    title=self.context['view'].kwargs['title_id']
-            ).exists():
-                raise serializers.ValidationError('Not applied many review')
-        return value
+    def create(self, validated_data):
+        """Создает отзыв, проверяя повтор уникальным ограничением."""
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Not applied many review'
+                ]}
+            )
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -120,27 +199,41 @@ class SignupSerializer(serializers.Serializer):
     )
 
     def validate(self, data):
-        username = data.get('username')
-        email = data.get('email')
-        if User.objects.filter(username=username, email=email):
-            return data
-        if username == WRONGUSERNAME:
+        if data.get('username') == WRONGUSERNAME:
             raise serializers.ValidationError(
                 "Invalid Username"
             )
-        if User.objects.filter(username=username):
-            raise serializers.ValidationError(
-                'That username is taken'
-            )
-        if User.objects.filter(email=email):
-            raise serializers.ValidationError(
-                'That email is taken'
-            )
         return data
 
     def create(self, validated_data):
-        user, _ = User.objects.get_or_create(**validated_data)
-        return user
+        """
+        Создает пользователя, полагаясь на уникальные ограничения.
+
+        Занятость имени и почты проверяется одним запросом только после
+        того, как вставка нарушила ограничение, поэтому одновременные
+        регистрации не приводят к ошибке сервера.
+        """
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            username = validated_data['username']
+            email = validated_data['email']
+            conflicts = list(User.objects.filter(
+                Q(username=username) | Q(email=email)
+            )[:2])
+            if not conflicts:
+                raise
+        for user in conflicts:
+            if user.username == username and user.email == email:
+                return user
+        if any(user.username == username for user in conflicts):
+            message = 'That username is taken'
+        else:
+            message = 'That email is taken'
+        raise serializers.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: [message]}
+        )
 
 
 class TokenSerializer(serializers.ModelSerializer):
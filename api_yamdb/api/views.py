@@ -1,18 +1,33 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (filters, status, viewsets)
 from rest_framework.decorators import action, api_view
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.settings import api_settings
 
-from api.constant import NO_PUT_METHODS
+from api.authentication import get_access_token
+from api.constant import (CATEGORIES_VERSION,
+                          GENRES_VERSION,
+                          IDS_QUERY_PARAM,
+                          NO_PUT_METHODS,
+                          TITLES_VERSION)
 from api.filters import TitleFilter
-from api.mixins import GenreCategoryMixin
+from api.mixins import (CachedResponseMixin,
+                        ConditionalGetMixin,
+                        FacetMixin,
+                        GenreCategoryMixin,
+                        NestedListMixin,
+                        SparseFieldsetMixin,
+                        ValuesListMixin)
+from api.pagination import (CachedCountPageNumberPagination,
+                            CachedCountPagination,
+                            PublicationPagination,
+                            TopRatedCursorPagination)
+from api.parsers import NDJSONParser
 from api.permissions import (AdminPermissions,
                              UserPermissions,
                              AdminOrReadOnlyPermissions)
@@ -20,8 +35,11 @@ from api.serializers import (CategorySerializer, CommentSerializer,
                              GenreSerializer, ReviewSerializer,
                              SignupSerializer, TitleSerializer,
                              TokenSerializer, UserSerializer)
-from reviews.models import Category, Genre, Review, Title
-from users.models import User
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
+from reviews.registry import category_registry, genre_registry
+from reviews.versions import get_title_version
+from users.models import OutgoingEmail, User
 
 
 class CategoryViewSet(GenreCategoryMixin):
@@ -29,6 +47,7 @@ class CategoryViewSet(GenreCategoryMixin):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    version_name = CATEGORIES_VERSION
 
 
 class GenreViewSet(GenreCategoryMixin):
@@ -36,18 +55,112 @@ class GenreViewSet(GenreCategoryMixin):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    version_name = GENRES_VERSION
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin,
+                   CachedResponseMixin,
+                   FacetMixin,
+                   SparseFieldsetMixin,
+                   ValuesListMixin,
+                   viewsets.ModelViewSet):
     """Представление для произведений."""
 
     http_method_names = ['get', 'post', 'patch', 'delete']
-    queryset = Title.objects.all()
+    queryset = Title.objects.prefetch_related('genretitles')
     serializer_class = TitleSerializer
     filter_backends = (DjangoFilterBackend,)
     permission_classes = (AdminOrReadOnlyPermissions,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
     filterset_class = TitleFilter
+    version_name = TITLES_VERSION
+    cache_name = TITLES_VERSION
+    list_cache_versions = (TITLES_VERSION,)
+    detail_cache_versions = (CATEGORIES_VERSION, GENRES_VERSION)
+    facets = ('genre', 'category', 'year')
+    sparse_required_fields = ('rating',)
+    parser_classes = (*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser)
+
+    def paginate_queryset(self, queryset):
+        # Выборка по списку id ограничена по размеру и отдается целиком.
+        if self.request.query_params.get(IDS_QUERY_PARAM):
+            return None
+        return super().paginate_queryset(queryset)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Создает одно произведение или, если передан массив или NDJSON,
+        все корректные произведения сразу. Ошибки возвращаются по индексам
+        элементов.
+        """
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save() if serializer.validated_data else []
+        created = self.get_queryset().in_bulk(
+            [title.pk for title in titles]
+        )
+        return Response(
+            {
+                'created': self.get_serializer(
+                    [created[title.pk] for title in titles], many=True
+                ).data,
+                'errors': serializer.item_errors,
+            },
+            status=(status.HTTP_201_CREATED if titles
+                    else status.HTTP_400_BAD_REQUEST)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, self.get_object, request, *args, **kwargs
+        )
+
+    def check_list_request(self):
+        super().check_list_request()
+        self.get_requested_facets()
+
+    @action(detail=False, pagination_class=TopRatedCursorPagination)
+    def top(self, request):
+        """Произведения с оценками от лучших к худшим."""
+        return self.values_response(self.filter_queryset(
+            self.get_queryset()
+        ).filter(rating__isnull=False))
+
+    def get_object_cache_version(self, lookup):
+        return get_title_version(lookup)
+
+    @staticmethod
+    def registry_facet(registry, counts):
+        """Подставляет название и слаг из реестра к количествам."""
+        snapshot = registry.snapshot()
+        facet = []
+        for pk, count in counts:
+            representation = snapshot.represent(pk)
+            if representation is not None:
+                representation['count'] = count
+                facet.append(representation)
+        return sorted(facet, key=lambda item: (-item['count'], item['slug']))
+
+    def get_genre_facet(self, queryset):
+        counts = GenreTitle.objects.filter(
+            title__in=queryset.values('pk')
+        ).order_by().values('genre_id').annotate(
+            count=Count('title_id', distinct=True)
+        ).values_list('genre_id', 'count')
+        return self.registry_facet(genre_registry, counts)
+
+    def get_category_facet(self, queryset):
+        counts = queryset.values('category_id').annotate(
+            count=Count('pk')
+        ).values_list('category_id', 'count')
+        return self.registry_facet(category_registry, counts)
+
+    def get_year_facet(self, queryset):
+        return list(queryset.values('year').annotate(
+            count=Count('pk')
+        ).order_by('year'))
 
 
 @api_view(['POST'])
@@ -57,12 +170,11 @@ def signup(request):
     serializer.is_valid(raise_exception=True)
     user = serializer.save()
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    OutgoingEmail.objects.create(
         subject="Код доступа авторизации",
         message=(f"Здравствуйте {user.username},"
                  f"Ваш код доступа: {confirmation_code}"),
-        from_email=None,
-        recipient_list=[user.email],
+        recipient=user.email,
     )
     return Response(request.data, status=status.HTTP_200_OK)
 
@@ -75,12 +187,12 @@ def token(request):
     username = serializer.data.get("username")
     user = get_object_or_404(User, username=username)
     return Response(
-        {"Token": str(AccessToken.for_user(user))},
+        {"Token": str(get_access_token(user))},
         status=status.HTTP_200_OK
     )
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """Представление для модели User."""
 
     lookup_field = "username"
@@ -90,6 +202,7 @@ class UsersViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     http_method_names = NO_PUT_METHODS
     permission_classes = (IsAuthenticated, AdminPermissions,)
+    pagination_class = CachedCountPageNumberPagination
 
     @ action(
         methods=['get', 'patch'],
@@ -109,51 +222,69 @@ class UsersViewSet(viewsets.ModelViewSet):
         return Response(result.data)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(NestedListMixin,
+                    SparseFieldsetMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Представление отзывов"""
 
     serializer_class = ReviewSerializer
     permission_classes = (
         IsAuthenticatedOrReadOnly, UserPermissions,)
     http_method_names = NO_PUT_METHODS
-    pagination_class = LimitOffsetPagination
+    pagination_class = PublicationPagination
+    sparse_required_fields = ('pub_date',)
+    parent_model = Title
+    parent_lookup = {'pk': 'title_id'}
 
-    def get_title(self):
-        """Отображает объект текущего произведения."""
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, pk=title_id)
+    def get_stored_count(self):
+        """Количество отзывов из счетчика произведения."""
+        return self.get_parent_queryset().values_list(
+            'rating_count', flat=True
+        ).first()
 
     def get_queryset(self):
         """Отображение всех отзывов по произведению."""
-        return self.get_title().reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
         """Создает отзыв для текущего произведения и обновляет рейтинг."""
-        title = self.get_title()
         serializer.save(
             author=self.request.user,
-            title=title
+            title=self.get_parent()
         )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedListMixin,
+                     SparseFieldsetMixin,
+                     ValuesListMixin,
+                     viewsets.ModelViewSet):
     """Предстваление комментариев."""
 
     serializer_class = CommentSerializer
     permission_classes = (
         IsAuthenticatedOrReadOnly, UserPermissions,)
     http_method_names = NO_PUT_METHODS
-    pagination_class = LimitOffsetPagination
+    pagination_class = PublicationPagination
+    sparse_required_fields = ('pub_date',)
+    parent_model = Review
+    parent_lookup = {'pk': 'review_id', 'title_id': 'title_id'}
 
-    def get_review(self):
-        return get_object_or_404(Review,
-                                 title=self.kwargs['title_id'],
-                                 pk=self.kwargs['review_id'])
+    def get_stored_count(self):
+        """Количество комментариев из счетчика отзыва."""
+        return self.get_parent_queryset().values_list(
+            'comment_count', flat=True
+        ).first()
 
     def get_queryset(self):
         """ Отображение всех комментариев по отзыву."""
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
         """Создает комментарий для текузего отзыва."""
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.get_parent())
@@ -14,6 +14,38 @@ class AbstractGenreCategoryModel(models.Model):
     class Meta:
         abstract = True
         ordering = ['name']
+        indexes = (
+            models.Index(
+                fields=('name',),
+                name='%(app_label)s_%(class)s_name_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
+
+
+class CounterFieldsModel(models.Model):
+    """
+    Абстрактная модель с денормализованными счетчиками.
+
+    Счетчики из `counter_fields` меняются только F-выражениями в сигналах,
+    поэтому при сохранении существующей записи они не перезаписываются
+    прочитанными ранее значениями.
+    """
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class NullsLastIndex(models.Index):
+    """
+    Индекс, у которого NULL идут после остальных значений в любом
+    направлении, — под сортировку `.desc(nulls_last=True)`.
+
+    В PostgreSQL обратный обход обычного индекса возвращает NULL первыми,
+    поэтому столбцы, допускающие NULL, создаются с NULLS LAST. SQLite
+    не поддерживает NULLS LAST в индексах, но при DESC и так ставит NULL
+    в конец.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        index = self
+        if schema_editor.connection.vendor == 'postgresql':
+            index = self.clone()
+            index.fields_orders = [
+                (name, f'{order} NULLS LAST'.strip())
+                if model._meta.get_field(name).null else (name, order)
+                for name, order in self.fields_orders
+            ]
+        return super(NullsLastIndex, index).create_sql(
+            model, schema_editor, using=using, **kwargs
+        )
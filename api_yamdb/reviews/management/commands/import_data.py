@@ -1,10 +1,22 @@
 import csv
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from time import perf_counter
 
-from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import F
 
 from django.conf import settings
 
+from api.constant import (CATEGORIES_VERSION,
+                          GENRES_VERSION,
+                          TITLES_VERSION,
+                          TOKEN_VERSION_CACHE_KEY)
 from reviews.models import (Category,
                             Genre,
                             GenreTitle,
@@ -12,14 +24,88 @@ from reviews.models import (Category,
                             Review,
                             Comment,
                             User)
+from reviews.versions import (bump_all_title_versions,
+                              bump_count_version,
+                              bump_versions)
+from users.signals import TOKEN_FIELDS
+
+
+BATCH_SIZE = 1000
+WORKERS = 1
+
+# Таблицы в порядке загрузки: файл, модель и внешние ключи в виде
+# {колонка CSV: (поле модели, связанная модель)}.
+CSV_TABLES = (
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': ('category_id', Category)}),
+    ('genre_title.csv', GenreTitle, {
+        'title_id': ('title_id', Title),
+        'genre_id': ('genre_id', Genre),
+    }),
+    ('users.csv', User, {}),
+    ('review.csv', Review, {
+        'title_id': ('title_id', Title),
+        'author': ('author_id', User),
+    }),
+    ('comments.csv', Comment, {
+        'review_id': ('review_id', Review),
+        'author': ('author_id', User),
+    }),
+)
 
 
 class Command(BaseCommand):
     help = 'Импорт данным из CSV файлов'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Потоковая загрузка пачками через bulk_create',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк в одной пачке при --bulk',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=WORKERS,
+            help='Количество таблиц, загружаемых одновременно при --bulk',
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Обновить измененные и добавить новые строки (с --bulk)',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Удалить строки, которых нет в CSV (только с --upsert)',
+        )
+
     def handle(self, *args, **kwargs):
         csv_dir = os.path.join(settings.BASE_DIR, 'static/data')
 
+        if kwargs['prune'] and not kwargs['upsert']:
+            raise CommandError('--prune можно использовать только с --upsert')
+        if kwargs['bulk'] or kwargs['upsert']:
+            self.batch_size = kwargs['batch_size']
+            self.upsert = kwargs['upsert']
+            self.prune = kwargs['prune']
+            self.workers = max(kwargs['workers'], 1)
+            if self.workers > 1 and connection.vendor == 'sqlite':
+                self.stdout.write(self.style.WARNING(
+                    'SQLite не поддерживает параллельную запись, '
+                    'таблицы будут загружены последовательно'
+                ))
+                self.workers = 1
+            self.bulk_import(csv_dir)
+            return
+
         self.import_categories(csv_dir)
         self.import_genres(csv_dir)
         self.import_titles(csv_dir)
@@ -28,6 +114,226 @@ class Command(BaseCommand):
         self.import_reviews(csv_dir)
         self.import_comments(csv_dir)
 
+    def bulk_import(self, csv_dir):
+        """Загружает все таблицы пачками, по транзакции на таблицу."""
+        self.known_ids = {
+            model: set(model.objects.values_list('pk', flat=True))
+            for _, model, _ in CSV_TABLES
+        }
+        self.seen_ids = {model: set() for model in self.known_ids}
+        self.load_tables(csv_dir)
+        if self.prune:
+            for _, model, _ in reversed(CSV_TABLES):
+                self.prune_table(model)
+        self.reset_sequences()
+        # bulk_create и bulk_update не вызывают сигналы, сбрасывающие
+        # версии кэша.
+        bump_versions(CATEGORIES_VERSION, GENRES_VERSION, TITLES_VERSION)
+        bump_all_title_versions()
+        for _, model, _ in CSV_TABLES:
+            bump_count_version(model)
+        call_command('rebuild_ratings', stdout=self.stdout)
+        call_command('rebuild_counters', stdout=self.stdout)
+
+    def load_tables(self, csv_dir):
+        """
+        Загружает таблицы пулом потоков.
+
+        Таблица начинает загружаться, как только загружены все таблицы,
+        на которые ссылаются ее внешние ключи, поэтому независимые таблицы
+        загружаются одновременно. С одним потоком таблицы загружаются
+        по порядку в текущем соединении.
+        """
+        if self.workers == 1:
+            for filename, model, foreign_keys in CSV_TABLES:
+                self.bulk_import_table(
+                    os.path.join(csv_dir, filename), model, foreign_keys
+                )
+            return
+        pending = {model: (filename, foreign_keys)
+                   for filename, model, foreign_keys in CSV_TABLES}
+        dependencies = {
+            model: {related for _, related in foreign_keys.values()}
+            for model, (_, foreign_keys) in pending.items()
+        }
+        loaded, running = set(), {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                ready = [model for model in pending
+                         if dependencies[model] <= loaded]
+                if not ready and not running:
+                    raise CommandError(
+                        'Циклическая зависимость между таблицами: '
+                        + ', '.join(model.__name__ for model in pending)
+                    )
+                for model in ready:
+                    filename, foreign_keys = pending.pop(model)
+                    future = pool.submit(
+                        self.bulk_import_in_thread,
+                        os.path.join(csv_dir, filename),
+                        model,
+                        foreign_keys
+                    )
+                    running[future] = model
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    loaded.add(running.pop(future))
+
+    def bulk_import_in_thread(self, path, model, foreign_keys):
+        """Загружает таблицу и закрывает соединение рабочего потока."""
+        try:
+            self.bulk_import_table(path, model, foreign_keys)
+        finally:
+            connections.close_all()
+
+    def read_batches(self, path, foreign_keys):
+        """Читает CSV пачками, отбрасывая строки с неизвестными связями."""
+        with open(path, 'r', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            while True:
+                rows = list(islice(reader, self.batch_size))
+                if not rows:
+                    return
+                batch, skipped = [], 0
+                for row in rows:
+                    row['id'] = int(row['id'])
+                    for column, (field, model) in foreign_keys.items():
+                        value = int(row.pop(column))
+                        if value not in self.known_ids[model]:
+                            skipped += 1
+                            break
+                        row[field] = value
+                    else:
+                        batch.append(row)
+                yield batch, skipped
+
+    def bulk_import_table(self, path, model, foreign_keys):
+        """Загружает одну таблицу и сообщает скорость загрузки."""
+        known_ids = self.known_ids[model]
+        seen_ids = self.seen_ids[model]
+        created = updated = skipped = 0
+        started = perf_counter()
+        with transaction.atomic():
+            for rows, rejected in self.read_batches(path, foreign_keys):
+                skipped += rejected
+                seen_ids.update(row['id'] for row in rows)
+                if self.upsert:
+                    updated += self.update_changed(model, [
+                        row for row in rows if row['id'] in known_ids
+                    ])
+                new_rows = [row for row in rows if row['id'] not in known_ids]
+                objs = [model(**row) for row in new_rows]
+                model.objects.bulk_create(objs, batch_size=self.batch_size)
+                self.restore_auto_dates(model, objs, new_rows)
+                known_ids.update(obj.pk for obj in objs)
+                created += len(objs)
+        elapsed = perf_counter() - started
+        rate = (created + updated) / elapsed if elapsed else created
+        self.stdout.write(self.style.SUCCESS(
+            f'{model._meta.verbose_name}: импортировано {created}, '
+            f'обновлено {updated} строк '
+            f'за {elapsed:.2f} с ({rate:.0f} строк/с)'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'{model._meta.verbose_name}: пропущено {skipped} строк '
+                f'с несуществующими связями'
+            ))
+
+    def restore_auto_dates(self, model, objs, rows):
+        """
+        Возвращает даты из CSV полям с auto_now_add.
+
+        bulk_create заменяет их текущим временем, и без этого --bulk
+        сохранял бы другие даты, чем обычный импорт, а следующий --upsert
+        переписывал бы каждую строку.
+        """
+        if not rows:
+            return
+        fields = [field for field in model._meta.concrete_fields
+                  if getattr(field, 'auto_now_add', False)
+                  and field.attname in rows[0]]
+        if not fields:
+            return
+        for obj, row in zip(objs, rows):
+            for field in fields:
+                setattr(obj, field.attname,
+                        field.to_python(row[field.attname]))
+        model.objects.bulk_update(
+            objs, [field.name for field in fields],
+            batch_size=self.batch_size
+        )
+
+    def update_changed(self, model, rows):
+        """Обновляет одним запросом только строки, отличающиеся от CSV."""
+        if not rows:
+            return 0
+        fields = [model._meta.get_field(name) for name in rows[0]
+                  if name != 'id']
+        existing = model.objects.in_bulk([row['id'] for row in rows])
+        changed, changed_fields, revoked_ids = [], set(), []
+        for row in rows:
+            obj = existing.get(row['id'])
+            if obj is None:
+                continue
+            diff = {field.name for field in fields
+                    if getattr(obj, field.attname)
+                    != field.to_python(row[field.attname])}
+            if not diff:
+                continue
+            for field in fields:
+                setattr(obj, field.attname,
+                        field.to_python(row[field.attname]))
+            changed.append(obj)
+            changed_fields |= diff
+            if model is User and diff.intersection(TOKEN_FIELDS):
+                revoked_ids.append(obj.pk)
+        if changed:
+            model.objects.bulk_update(
+                changed, changed_fields, batch_size=self.batch_size
+            )
+        if revoked_ids:
+            self.revoke_tokens(revoked_ids)
+        return len(changed)
+
+    def revoke_tokens(self, user_ids):
+        """
+        Делает недействительными токены пользователей со сменой роли.
+
+        bulk_update не вызывает pre_save, который увеличивает версию
+        токенов, поэтому версия увеличивается здесь, а закэшированные
+        версии сбрасываются после фиксации транзакции.
+        """
+        User.objects.filter(pk__in=user_ids).update(
+            token_version=F('token_version') + 1
+        )
+        keys = [TOKEN_VERSION_CACHE_KEY.format(user_id=user_id)
+                for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def prune_table(self, model):
+        """Удаляет строки, отсутствующие в последней выгрузке."""
+        stale_ids = list(self.known_ids[model] - self.seen_ids[model])
+        deleted = 0
+        with transaction.atomic():
+            for start in range(0, len(stale_ids), self.batch_size):
+                deleted += model.objects.filter(
+                    pk__in=stale_ids[start:start + self.batch_size]
+                ).delete()[1].get(model._meta.label, 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'{model._meta.verbose_name}: удалено {deleted} строк'
+        ))
+
+    def reset_sequences(self):
+        """Сдвигает последовательности id после вставки явных ключей."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [model for _, model, _ in CSV_TABLES]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
     def import_categories(self, csv_dir):
         with open(os.path.join(csv_dir, 'category.csv'),
                   'r',
@@ -86,15 +392,17 @@ class Command(BaseCommand):
                 title = Title.objects.get(id=row['title_id'])
                 genre = Genre.objects.get(id=row['genre_id'])
 
-                GenreTitle.objects.create(
+                _, created = GenreTitle.objects.get_or_create(
+                    id=row['id'],
                     title=title,
                     genre=genre
                 )
-                self.stdout.write(self.style.SUCCESS(
-                    f'Успешно импортирован GenreTitle с '
-                    f'Title ID {row["title_id"]} '
-                    f'и Genre ID {row["genre_id"]}'
-                ))
+                if created:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Успешно импортирован GenreTitle с '
+                        f'Title ID {row["title_id"]} '
+                        f'и Genre ID {row["genre_id"]}'
+                    ))
 
     def import_users(self, csv_dir):
         with open(os.path.join(csv_dir, 'users.csv'),
@@ -128,6 +436,10 @@ class Command(BaseCommand):
                     pub_date=row['pub_date'],
                 )
                 if created:
+                    # auto_now_add при создании заменяет дату из CSV.
+                    Review.objects.filter(id=review.id).update(
+                        pub_date=row['pub_date']
+                    )
                     self.stdout.write(self.style.SUCCESS(
                         f'Успешно импортирован review: {review.id}'
                     ))
@@ -146,6 +458,10 @@ class Command(BaseCommand):
                     pub_date=row['pub_date'],
                 )
                 if created:
+                    # auto_now_add при создании заменяет дату из CSV.
+                    Comment.objects.filter(id=comment.id).update(
+                        pub_date=row['pub_date']
+                    )
                     self.stdout.write(self.style.SUCCESS(
                         f'Успешно импортирован comment: {comment.id}'
                     ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from reviews.models import Comment, Review
+from reviews.versions import bump_count_version
+
+
+class Command(BaseCommand):
+    help = 'Пересчет сохраненного количества комментариев всех отзывов'
+
+    def handle(self, *args, **kwargs):
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review')
+        updated = Review.objects.update(
+            comment_count=Coalesce(
+                Subquery(
+                    comments.annotate(total=Count('pk')).values('total')
+                ),
+                0
+            ),
+        )
+        bump_count_version(Comment)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счетчики комментариев отзывов: {updated}'
+        ))
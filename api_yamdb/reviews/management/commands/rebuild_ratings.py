@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api.constant import TITLES_VERSION
+from reviews.models import Review, Title
+from reviews.versions import (bump_all_title_versions,
+                              bump_count_version,
+                              bump_versions)
+
+
+class Command(BaseCommand):
+    help = 'Пересчет сохраненных рейтингов всех произведений'
+
+    def handle(self, *args, **kwargs):
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        updated = Title.objects.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(average=Avg('score')).values('average')
+            ),
+        )
+        bump_versions(TITLES_VERSION)
+        bump_all_title_versions()
+        bump_count_version(Title)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны рейтинги произведений: {updated}'
+        ))
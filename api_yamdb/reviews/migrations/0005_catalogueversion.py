@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 18:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Раздел')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия раздела каталога',
+                'verbose_name_plural': 'Версии разделов каталога',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-18 18:21
+
+from django.db import migrations, models
+from django.db.models import Avg, OuterRef, Subquery
+
+
+def fill_ratings(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(
+        rating=Subquery(
+            reviews.annotate(average=Avg('score')).values('average')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_review_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 18:51
+
+from django.db import migrations
+import reviews.indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_stored_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=reviews.indexes.NullsLastIndex(fields=['-rating', '-id'], name='title_rating_desc_idx'),
+        ),
+    ]
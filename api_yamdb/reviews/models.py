@@ -1,12 +1,17 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import ExpressionWrapper, FloatField
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
 
 from api.constant import (MAX_SCORE,
                           MAX_LEN_CHARFIELD,
                           MAX_LEN_OUT,
+                          MAX_LEN_VERSION_NAME,
                           MIN_SCORE,
                           SET_ON_DELETE)
-from reviews.abstracts import AbstractGenreCategoryModel
+from reviews.abstracts import AbstractGenreCategoryModel, CounterFieldsModel
+from reviews.indexes import NullsLastIndex
 from reviews.validators import validate_year
 from users.models import User
 
@@ -27,9 +32,19 @@ class Genre(AbstractGenreCategoryModel):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+def average_rating(rating_sum, rating_count):
+    """Выражение средней оценки, NULL при отсутствии оценок."""
+    return ExpressionWrapper(
+        Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+        output_field=FloatField()
+    )
+
+
+class Title(CounterFieldsModel):
     """Модель произведения."""
 
+    counter_fields = ('rating_sum', 'rating_count', 'rating')
+
     name = models.CharField(max_length=MAX_LEN_CHARFIELD,
                             verbose_name='Название')
     year = models.SmallIntegerField(
@@ -50,12 +65,45 @@ class Title(models.Model):
         on_delete=models.SET(SET_ON_DELETE),
         verbose_name='Категория'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         default_related_name = 'titles'
         ordering = ['name', '-year']
+        indexes = (
+            models.Index(
+                fields=('name', '-year'),
+                name='title_name_year_idx',
+            ),
+            models.Index(
+                fields=('year', 'name'),
+                name='title_year_name_idx',
+            ),
+            models.Index(
+                fields=('rating', 'id'),
+                name='title_rating_idx',
+            ),
+            NullsLastIndex(
+                fields=('-rating', '-id'),
+                name='title_rating_desc_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.name} {self.description[:MAX_LEN_OUT]}'
@@ -98,9 +146,11 @@ class TextPublicationAuthorModel(models.Model):
         return self.text
 
 
-class Review(TextPublicationAuthorModel):
+class Review(CounterFieldsModel, TextPublicationAuthorModel):
     """Класс для работы с отзывами."""
 
+    counter_fields = ('comment_count',)
+
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -114,6 +164,11 @@ class Review(TextPublicationAuthorModel):
                     MaxValueValidator(
                     MAX_SCORE, message=f'Максимальное значение {MAX_SCORE}')]
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta(TextPublicationAuthorModel.Meta):
         verbose_name = 'Отзыв'
@@ -124,6 +179,12 @@ class Review(TextPublicationAuthorModel):
                 name='reviews_unique',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx',
+            ),
+        )
         default_related_name = 'reviews'
 
 
@@ -139,4 +200,29 @@ class Comment(TextPublicationAuthorModel):
     class Meta(TextPublicationAuthorModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx',
+            ),
+        )
         default_related_name = 'comments'
+
+
+class CatalogueVersion(models.Model):
+    """Версия изменений раздела каталога для условных GET-запросов."""
+
+    name = models.CharField(
+        'Раздел',
+        max_length=MAX_LEN_VERSION_NAME,
+        primary_key=True
+    )
+    version = models.PositiveBigIntegerField('Версия', default=0)
+    modified = models.DateTimeField('Дата изменения', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Версия раздела каталога'
+        verbose_name_plural = 'Версии разделов каталога'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,69 @@
+from threading import Lock
+
+from api.constant import CATEGORIES_VERSION, GENRES_VERSION
+from reviews.models import Category, Genre
+from reviews.versions import get_version
+
+
+class SlugRegistry:
+    """
+    Реестр категорий или жанров в памяти процесса.
+
+    Записи загружаются целиком при первом обращении и перечитываются, когда
+    меняется версия раздела каталога, поэтому разрешение слагов и вывод
+    вложенных объектов не требуют запросов к таблице на каждый объект.
+    """
+
+    def __init__(self, model, version_name):
+        self.model = model
+        self.version_name = version_name
+        self._lock = Lock()
+        self._snapshot = None
+
+    def __deepcopy__(self, memo):
+        # Реестр общий для процесса: поля сериализаторов копируются
+        # при создании, но должны ссылаться на один и тот же реестр.
+        return self
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def snapshot(self):
+        """Возвращает актуальный снимок реестра, проверив версию раздела."""
+        version = get_version(self.version_name)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = RegistrySnapshot(
+                    version, self.model.objects.all()
+                )
+            return self._snapshot
+
+
+class RegistrySnapshot:
+    """Неизменяемый снимок записей реестра."""
+
+    def __init__(self, version, objects):
+        self.version = version
+        self.by_id = {}
+        self.by_slug = {}
+        self.representations = {}
+        for obj in objects:
+            self.by_id[obj.pk] = obj
+            self.by_slug[obj.slug] = obj
+            self.representations[obj.pk] = {
+                'name': obj.name, 'slug': obj.slug
+            }
+
+    def get_by_slug(self, slug):
+        return self.by_slug.get(slug)
+
+    def represent(self, pk):
+        representation = self.representations.get(pk)
+        return None if representation is None else dict(representation)
+
+
+category_registry = SlugRegistry(Category, CATEGORIES_VERSION)
+genre_registry = SlugRegistry(Genre, GENRES_VERSION)
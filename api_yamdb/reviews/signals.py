@@ -0,0 +1,189 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from api.constant import CATEGORIES_VERSION, GENRES_VERSION, TITLES_VERSION
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, average_rating)
+from reviews.registry import category_registry, genre_registry
+from reviews.versions import (bump_count_version,
+                              bump_title_version,
+                              bump_versions)
+
+# Разделы каталога, ответы которых зависят от данных модели.
+VERSIONED_MODELS = {
+    Category: (CATEGORIES_VERSION, TITLES_VERSION),
+    Genre: (GENRES_VERSION, TITLES_VERSION),
+    Title: (TITLES_VERSION,),
+    GenreTitle: (TITLES_VERSION,),
+    Review: (TITLES_VERSION,),
+}
+
+
+def change_rating(title_id, score, count):
+    """Атомарно изменяет сумму, количество оценок и рейтинг произведения."""
+    rating_sum = F('rating_sum') + score
+    rating_count = F('rating_count') + count
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=average_rating(rating_sum, rating_count)
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю оценку отзыва перед его изменением."""
+    instance._previous = None
+    if raw or instance.pk is None:
+        return
+    instance._previous = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новую или измененную оценку в рейтинге произведения."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None:
+        change_rating(instance.title_id, instance.score, 1)
+        return
+    title_id, score = previous
+    if title_id != instance.title_id:
+        change_rating(title_id, -score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    elif score != instance.score:
+        change_rating(title_id, instance.score - score, 0)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    """Исключает оценку удаленного отзыва из рейтинга произведения."""
+    change_rating(instance.title_id, -instance.score, -1)
+
+
+def change_comment_count(review_id, count):
+    """Атомарно изменяет количество комментариев отзыва."""
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + count
+    )
+
+
+@receiver(pre_save, sender=Comment)
+def remember_previous_review(sender, instance, raw=False, **kwargs):
+    """Запоминает прежний отзыв комментария перед его изменением."""
+    instance._previous_review_id = None
+    if raw or instance.pk is None:
+        return
+    instance._previous_review_id = Comment.objects.filter(
+        pk=instance.pk
+    ).values_list('review_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def add_comment(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый или перенесенный комментарий в счетчике отзыва."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_review_id', None)
+    if created or previous is None:
+        change_comment_count(instance.review_id, 1)
+    elif previous != instance.review_id:
+        change_comment_count(previous, -1)
+        change_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment(sender, instance, **kwargs):
+    """Исключает удаленный комментарий из счетчика отзыва."""
+    change_comment_count(instance.review_id, -1)
+
+
+def bump_catalogue_versions(sender, raw=False, **kwargs):
+    """Отмечает изменение разделов каталога, зависящих от модели."""
+    if not raw:
+        bump_versions(*VERSIONED_MODELS[sender])
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_catalogue_versions, sender=model)
+    post_delete.connect(bump_catalogue_versions, sender=model)
+
+
+# Модели, для списков которых кэшируется количество строк, и модели,
+# изменение которых меняет результат фильтрации этих списков.
+COUNTED_MODELS = {
+    Category: Category,
+    Genre: Genre,
+    Title: Title,
+    GenreTitle: Title,
+    Review: Review,
+    Comment: Comment,
+}
+
+
+def bump_cached_count_version(sender, raw=False, **kwargs):
+    """Делает недействительными закэшированные количества строк."""
+    if not raw:
+        bump_count_version(COUNTED_MODELS[sender])
+
+
+for model in COUNTED_MODELS:
+    post_save.connect(bump_cached_count_version, sender=model)
+    post_delete.connect(bump_cached_count_version, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres_version(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Отмечает изменение жанров произведения."""
+    if not action.startswith('post_'):
+        return
+    bump_versions(TITLES_VERSION)
+    bump_count_version(Title)
+    if not reverse:
+        bump_title_version(instance.pk)
+        return
+    # Для связей, измененных со стороны жанра, не всегда известны
+    # произведения, поэтому сбрасывается версия всех жанров.
+    bump_versions(GENRES_VERSION)
+    for title_id in pk_set or ():
+        bump_title_version(title_id)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def bump_title_on_change(sender, instance, raw=False, **kwargs):
+    """Сбрасывает версию измененного произведения."""
+    if not raw:
+        bump_title_version(instance.pk)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_title_on_related_change(sender, instance, raw=False, **kwargs):
+    """Сбрасывает версию произведения при изменении его жанров и отзывов."""
+    if not raw:
+        bump_title_version(instance.title_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_registry(sender, **kwargs):
+    """Сбрасывает реестр категорий процесса."""
+    category_registry.invalidate()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_registry(sender, **kwargs):
+    """Сбрасывает реестр жанров процесса."""
+    genre_registry.invalidate()
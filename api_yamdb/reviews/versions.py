@@ -0,0 +1,103 @@
+from time import time_ns
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from api.constant import (ALL_TITLES_VERSION_CACHE_KEY,
+                          COUNT_VERSION_CACHE_KEY,
+                          TITLE_VERSION_CACHE_KEY)
+from reviews.models import CatalogueVersion
+
+
+def bump_versions(*names):
+    """Увеличивает версии разделов каталога после изменения данных."""
+    now = timezone.now()
+    for name in names:
+        updated = CatalogueVersion.objects.filter(name=name).update(
+            version=F('version') + 1, modified=now
+        )
+        if not updated:
+            CatalogueVersion.objects.get_or_create(
+                name=name, defaults={'version': 1, 'modified': now}
+            )
+
+
+def get_version(name):
+    """Возвращает версию раздела и время его последнего изменения."""
+    version, _ = CatalogueVersion.objects.get_or_create(name=name)
+    return version.version, version.modified
+
+
+def get_versions(*names):
+    """Возвращает версии нескольких разделов одним запросом."""
+    versions = {
+        name: (version, modified)
+        for name, version, modified in CatalogueVersion.objects.filter(
+            name__in=names
+        ).values_list('name', 'version', 'modified')
+    }
+    for name in set(names) - set(versions):
+        versions[name] = get_version(name)
+    return versions
+
+
+def get_cached_version(key):
+    """
+    Возвращает версию из кэша.
+
+    Версия начинается с текущего времени в наносекундах, поэтому после
+    вытеснения ключа из кэша она не совпадет ни с одной прежней.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cached_version(key):
+    """Увеличивает версию в кэше."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), None)
+
+
+def get_title_version(title_id):
+    """
+    Возвращает версию произведения вместе с общей версией всех
+    произведений.
+    """
+    keys = (ALL_TITLES_VERSION_CACHE_KEY,
+            TITLE_VERSION_CACHE_KEY.format(title_id=title_id))
+    versions = cache.get_many(keys)
+    return tuple(versions.get(key) or get_cached_version(key)
+                 for key in keys)
+
+
+def bump_title_version(title_id):
+    """Увеличивает версию произведения после изменения его данных."""
+    bump_cached_version(TITLE_VERSION_CACHE_KEY.format(title_id=title_id))
+
+
+def bump_all_title_versions():
+    """
+    Меняет версии всех произведений сразу: после массовых изменений в
+    обход сигналов (пересчеты, загрузка bulk_create и bulk_update).
+    """
+    bump_cached_version(ALL_TITLES_VERSION_CACHE_KEY)
+
+
+def get_count_version(model):
+    """Возвращает версию количества строк модели."""
+    return get_cached_version(
+        COUNT_VERSION_CACHE_KEY.format(model=model._meta.label_lower)
+    )
+
+
+def bump_count_version(model):
+    """Увеличивает версию количества строк модели."""
+    bump_cached_version(
+        COUNT_VERSION_CACHE_KEY.format(model=model._meta.label_lower)
+    )
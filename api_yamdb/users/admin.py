@@ -5,7 +5,7 @@ from django.contrib.auth.forms import UserChangeForm
 from reviews.models import Category, Genre, Title, Review, Comment
 from users.admin_mixins import GenreCategoryMixin
 from users.forms import UserChangeForm
-from users.models import User
+from users.models import OutgoingEmail, User
 
 
 admin.site.empty_value_display = "-пусто-"
@@ -89,3 +89,19 @@ class CommentAdmin(admin.ModelAdmin):
     )
     search_fields = ('author',)
     list_filter = ('author', 'pub_date')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Админская конфигурация для очереди исходящих писем."""
+
+    list_display = (
+        'id',
+        'recipient',
+        'subject',
+        'created',
+        'next_attempt',
+        'attempts'
+    )
+    search_fields = ('recipient',)
+    readonly_fields = ('last_error',)
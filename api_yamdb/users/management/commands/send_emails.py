@@ -0,0 +1,109 @@
+from datetime import timedelta
+from time import sleep
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.constant import (EMAIL_BATCH_SIZE,
+                          EMAIL_CLAIM_TIMEOUT,
+                          EMAIL_MAX_ATTEMPTS,
+                          EMAIL_POLL_INTERVAL,
+                          EMAIL_RETRY_DELAY)
+from users.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящих писем'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=EMAIL_BATCH_SIZE,
+            help='Количество писем, отправляемых за один проход',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ожидать новые письма',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=EMAIL_POLL_INTERVAL,
+            help='Пауза в секундах между проходами при --loop',
+        )
+
+    def handle(self, *args, **kwargs):
+        while True:
+            processed = self.send_batch(kwargs['batch_size'])
+            if processed == kwargs['batch_size']:
+                continue
+            if not kwargs['loop']:
+                return
+            sleep(kwargs['interval'])
+
+    def claim_batch(self, batch_size):
+        """
+        Забирает пачку писем, срок которых подошел.
+
+        Следующая попытка писем сдвигается на EMAIL_CLAIM_TIMEOUT, поэтому
+        другие процессы их не возьмут, а блокировки строк снимаются до
+        отправки. Если процесс упадет, письма вернутся в очередь по
+        истечении этого срока.
+        """
+        with transaction.atomic():
+            emails = list(OutgoingEmail.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                next_attempt__lte=timezone.now(),
+                attempts__lt=EMAIL_MAX_ATTEMPTS,
+            )[:batch_size])
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(next_attempt=timezone.now() + timedelta(
+                seconds=EMAIL_CLAIM_TIMEOUT
+            ))
+        return emails
+
+    def send_batch(self, batch_size):
+        """Отправляет пачку писем и записывает результат отправки."""
+        emails = self.claim_batch(batch_size)
+        if not emails:
+            return 0
+        sent, failed = [], []
+        connection = get_connection()
+        try:
+            for email in emails:
+                try:
+                    # Открывает соединение, если его еще нет или прошлое
+                    # закрыто после ошибки.
+                    connection.open()
+                    connection.send_messages([EmailMessage(
+                        subject=email.subject,
+                        body=email.message,
+                        to=[email.recipient],
+                    )])
+                except Exception as error:
+                    connection.close()
+                    email.attempts += 1
+                    email.next_attempt = timezone.now() + timedelta(
+                        seconds=EMAIL_RETRY_DELAY * 2 ** (email.attempts - 1)
+                    )
+                    email.last_error = str(error)
+                    failed.append(email)
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+        with transaction.atomic():
+            OutgoingEmail.objects.filter(pk__in=sent).delete()
+            OutgoingEmail.objects.bulk_update(
+                failed, ('attempts', 'next_attempt', 'last_error')
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Отправлено писем: {len(sent)}, с ошибкой: {len(failed)}'
+        ))
+        return len(emails)
@@ -1,9 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from api.constant import (
     USER, ADMIN, MODERATOR, WRONGUSERNAME,
-    MAX_LEN_USERNAME, MAX_LEN_EMAIL
+    MAX_LEN_CHARFIELD, MAX_LEN_USERNAME, MAX_LEN_EMAIL
 )
 from users.validators import user_name_validator
 
@@ -36,11 +37,19 @@ class User(AbstractUser):
         max_length=max(len(role) for role, _ in ROLE_CHOICES),
         choices=ROLE_CHOICES
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
         ordering = ("role",)
+        indexes = (
+            models.Index(fields=('role',), name='user_role_idx'),
+        )
         constraints = [
             models.CheckConstraint(
                 check=~models.Q(username=WRONGUSERNAME),
@@ -50,3 +59,25 @@ class User(AbstractUser):
 
     def __str__(self):
         return f'{self.username}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField('Тема', max_length=MAX_LEN_CHARFIELD)
+    message = models.TextField('Текст')
+    recipient = models.EmailField('Получатель', max_length=MAX_LEN_EMAIL)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now, db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt',)
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
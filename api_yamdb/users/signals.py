@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.constant import TOKEN_VERSION_CACHE_KEY
+from reviews.versions import bump_count_version
+from users.models import User
+
+TOKEN_FIELDS = ('role', 'is_superuser', 'is_active')
+
+
+@receiver(pre_save, sender=User)
+def bump_token_version(sender, instance, raw=False, **kwargs):
+    """Делает недействительными токены при смене роли или статуса."""
+    if raw or instance.pk is None:
+        return
+    previous = User.objects.filter(
+        pk=instance.pk
+    ).values(*TOKEN_FIELDS).first()
+    if previous is None:
+        return
+    if any(previous[field] != getattr(instance, field)
+           for field in TOKEN_FIELDS):
+        instance.token_version += 1
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_token_version(sender, instance, **kwargs):
+    """Сбрасывает закэшированную версию токенов пользователя."""
+    cache.delete(TOKEN_VERSION_CACHE_KEY.format(user_id=instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_count_version(sender, raw=False, **kwargs):
+    """Делает недействительными закэшированные количества пользователей."""
+    if not raw:
+        bump_count_version(User)
@@ -1,8 +1,16 @@
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 import pytest
 from django.core import mail
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.models import OutgoingEmail
 
 from tests.utils import (
     invalid_data_for_user_patch_and_creation,
@@ -112,6 +120,11 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` ставит письмо '
+            'в очередь, а не отправляет его во время запроса.'
+        )
+        call_command('send_emails', stdout=StringIO())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -375,3 +388,104 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_signup_email_retried_after_failure(self, client):
+        valid_data = {
+            'email': 'retry@yamdb.fake',
+            'username': 'retry_username'
+        }
+        response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert response.status_code == HTTPStatus.OK
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError('SMTP недоступен')
+        ):
+            call_command('send_emails', stdout=StringIO())
+        email = OutgoingEmail.objects.get(recipient=valid_data['email'])
+        assert email.attempts == 1, (
+            'Проверьте, что неудачная отправка письма увеличивает счетчик '
+            'попыток.'
+        )
+        assert email.next_attempt > timezone.now(), (
+            'Проверьте, что повторная отправка письма откладывается.'
+        )
+
+        outbox_before_count = len(mail.outbox)
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count
+
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert valid_data['email'] in mail.outbox[-1].to
+        assert not OutgoingEmail.objects.exists(), (
+            'Проверьте, что отправленное письмо удаляется из очереди.'
+        )
+
+    def test_send_emails_reconnects_outside_transaction(self, client):
+        for username in ('first_mail', 'second_mail'):
+            client.post(self.URL_SIGNUP, data={
+                'email': f'{username}@yamdb.fake', 'username': username
+            })
+        calls = []
+
+        def send_messages(messages):
+            assert not connection.in_atomic_block, (
+                'Проверьте, что письма отправляются вне транзакции, '
+                'удерживающей блокировки строк очереди.'
+            )
+            assert not OutgoingEmail.objects.filter(
+                next_attempt__lte=timezone.now()
+            ).exists(), (
+                'Проверьте, что письма помечаются как отправляемые до '
+                'начала отправки.'
+            )
+            calls.append(messages)
+            if len(calls) == 1:
+                raise ConnectionError('Соединение закрыто сервером')
+            return len(messages)
+
+        backend = 'django.core.mail.backends.locmem.EmailBackend'
+        with mock.patch(f'{backend}.send_messages',
+                        side_effect=send_messages), \
+                mock.patch(f'{backend}.close') as close_mock:
+            call_command('send_emails', stdout=StringIO())
+        assert len(calls) == 2, (
+            'Проверьте, что после ошибки отправки остальные письма пачки '
+            'отправляются.'
+        )
+        assert close_mock.call_count == 2, (
+            'Проверьте, что соединение закрывается после ошибки отправки '
+            'и в конце пачки.'
+        )
+        assert OutgoingEmail.objects.get().attempts == 1
+
+    def test_signup_relies_on_unique_constraints(self, client,
+                                                 django_user_model):
+        valid_data = {
+            'email': 'single@yamdb.fake',
+            'username': 'single_query'
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert response.status_code == HTTPStatus.OK
+        user_table = django_user_model._meta.db_table
+        selects = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')
+                   and f'FROM "{user_table}"' in query['sql']]
+        assert not selects, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` для нового '
+            'пользователя не выполняет предварительных проверок '
+            'уникальности.'
+        )
+
+        response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert response.status_code == HTTPStatus.OK
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'other@yamdb.fake', 'username': valid_data['username']
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert django_user_model.objects.filter(
+            username=valid_data['username']
+        ).count() == 1
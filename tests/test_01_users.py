@@ -1,6 +1,10 @@
 from http import HTTPStatus
 
 import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
 from tests.utils import (
     check_pagination, invalid_data_for_user_patch_and_creation
@@ -564,3 +568,38 @@ class Test01UserAPI:
             f'Проверьте, что PATCH-запрос к `{self.USERS_ME_URL}` с ключом '
             '`role` не изменяет роль пользователя.'
         )
+
+    def test_11_role_claims_token(self, admin_client, user):
+        response = APIClient().post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user)
+        })
+        assert response.status_code == HTTPStatus.OK
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["Token"]}'
+        )
+
+        assert client.get('/api/v1/titles/').status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        user_table = user._meta.db_table
+        assert not [query for query in context.captured_queries
+                    if user_table in query['sql']], (
+            'Проверьте, что для запросов с токеном, содержащим роль '
+            'пользователя, запись пользователя не загружается из базы.'
+        )
+        assert client.get(self.USERS_ME_URL).json()['username'] == (
+            user.username
+        )
+
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли пользователя ранее выданные '
+            'токены перестают действовать.'
+        )
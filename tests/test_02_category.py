@@ -153,3 +153,29 @@ class Test02CategoryAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, self.CATEGORY_URL, data,
                           'модератора', categories, HTTPStatus.FORBIDDEN)
+
+    def test_06_category_conditional_get(self, client, admin_client):
+        create_categories(admin_client)
+        response = client.get(self.CATEGORY_URL)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{self.CATEGORY_URL}` '
+            'содержит заголовки `ETag` и `Last-Modified`.'
+        )
+
+        response = client.get(self.CATEGORY_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{self.CATEGORY_URL}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+
+        admin_client.post(
+            self.CATEGORY_URL, data={'name': 'Музыка', 'slug': 'music'}
+        )
+        response = client.get(self.CATEGORY_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после изменения категорий GET-запрос к '
+            f'`{self.CATEGORY_URL}` со старым `If-None-Match` возвращает '
+            'ответ со статусом 200.'
+        )
+        assert response.get('ETag') != etag
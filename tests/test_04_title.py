@@ -1,7 +1,13 @@
+import json
 from http import HTTPStatus
+from unittest import mock
 
 import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from api.mixins import CachedResponseMixin, SparseFieldsetMixin
 from tests.utils import (
     check_pagination, check_permissions, create_categories, create_genre,
     create_titles
@@ -353,3 +359,478 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_titles_list_query_count(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        for idx in range(6):
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % 2]['slug'],
+            })
+            assert response.status_code == HTTPStatus.CREATED
+
+        # Первый запрос заполняет кэш количества произведений.
+        client.get(self.TITLES_URL)
+        query_counts = []
+        for limit in (1, 6):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{self.TITLES_URL}?limit={limit}')
+            assert len(response.json()['results']) == limit
+            query_counts.append(len(context.captured_queries))
+        assert query_counts[0] == query_counts[1], (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` выполняет '
+            'фиксированное количество запросов к базе данных, не зависящее '
+            'от размера страницы.'
+        )
+
+    def test_08_titles_filter_by_several_genres(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        horror, comedy, drama = (genre['slug'] for genre in genres)
+
+        cases = (
+            (f'genre={horror},{comedy}', {titles[0]['id']}),
+            (f'genre={horror},{drama}', {titles[0]['id'], titles[1]['id']}),
+            (f'genre={horror},{drama}&genre_op=and', set()),
+            (f'genre={horror},{comedy}&genre_op=and', {titles[0]['id']}),
+            ('genre=dram&match=exact', set()),
+            ('genre=dram', {titles[1]['id']}),
+            (f'genre={drama}&match=exact', {titles[1]['id']}),
+            (f'category={categories[1]["slug"]}&match=exact',
+             {titles[1]['id']}),
+        )
+        for query, expected_ids in cases:
+            response = client.get(f'{self.TITLES_URL}?{query}')
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            ids = [title['id'] for title in data['results']]
+            assert len(ids) == len(set(ids)) == data['count'], (
+                f'Проверьте, что фильтрация `{self.TITLES_URL}?{query}` не '
+                'возвращает повторяющиеся произведения.'
+            )
+            assert set(ids) == expected_ids, (
+                f'Проверьте фильтрацию `{self.TITLES_URL}?{query}`.'
+            )
+
+        response = client.get(f'{self.TITLES_URL}?match=fuzzy')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_09_titles_conditional_get(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        for url in (self.TITLES_URL, detail_url):
+            etag = client.get(url).get('ETag')
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+
+        list_response = client.get(self.TITLES_URL)
+        list_etag = list_response.get('ETag')
+        missing_url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=99999)
+        checks = (
+            (missing_url, HTTPStatus.NOT_FOUND),
+            (f'{self.TITLES_URL}?match=fuzzy', HTTPStatus.BAD_REQUEST),
+            (f'{self.TITLES_URL}?facets=unknown', HTTPStatus.BAD_REQUEST),
+            (f'{self.TITLES_URL}?year=1', HTTPStatus.OK),
+            (detail_url, HTTPStatus.OK),
+        )
+        for url, status in checks:
+            response = client.get(url, HTTP_IF_NONE_MATCH=list_etag)
+            assert response.status_code == status, (
+                f'Проверьте, что ETag списка не дает ответ 304 на `{url}`: '
+                'ETag должен зависеть от запроса, а 304 возвращаться только '
+                'после проверки объекта и фильтров.'
+            )
+        response = client.get(
+            self.TITLES_URL,
+            HTTP_IF_MODIFIED_SINCE=list_response.get('Last-Modified')
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что без `If-None-Match` заголовок '
+            '`If-Modified-Since` не приводит к ответу 304.'
+        )
+
+        admin_client.post(
+            f'{detail_url}reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления отзыва произведение '
+            'считается измененным.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_10_titles_response_cache(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        for url in (self.TITLES_URL, detail_url):
+            expected = client.get(url).json()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.json() == expected
+            assert not [query for query in context.captured_queries
+                        if '"reviews_title"' in query['sql']], (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдается '
+                'из кэша без выборки произведений.'
+            )
+
+        admin_client.patch(detail_url, data={
+            'name': 'Терминатор 2',
+            'genre': [genres[2]['slug']],
+        })
+        data = client.get(detail_url).json()
+        assert data['name'] == 'Терминатор 2'
+        assert data['genre'] == [genres[2]], (
+            'Проверьте, что изменение жанров произведения сбрасывает '
+            'закэшированный ответ.'
+        )
+        names = {title['name'] for title in
+                 client.get(self.TITLES_URL).json()['results']}
+        assert 'Терминатор 2' in names
+
+        indented = client.get(
+            self.TITLES_URL, HTTP_ACCEPT='application/json; indent=4'
+        )
+        plain = client.get(self.TITLES_URL)
+        assert plain.content != indented.content
+        assert plain.content == client.get(
+            self.TITLES_URL, HTTP_ACCEPT='application/json'
+        ).content
+        assert b'\n' not in plain.content, (
+            'Проверьте, что ответы с разными параметрами Accept '
+            'кэшируются раздельно.'
+        )
+
+        with pytest.raises(ImproperlyConfigured):
+            type('NoVersions', (CachedResponseMixin,), {'cache_name': 'x'})
+
+    def test_11_titles_create_without_slug_lookups(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+        }
+        admin_client.post(self.TITLES_URL, data=data)
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                self.TITLES_URL, data={**data, 'name': 'Чужие'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['category'] == categories[0]
+        assert len(response.json()['genre']) == len(genres)
+        lookups = [query['sql'] for query in context.captured_queries
+                   if '"reviews_genre"."slug" =' in query['sql']
+                   or '"reviews_category"."slug" =' in query['sql']]
+        assert not lookups, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` разрешает '
+            'слаги жанров и категорий без запросов к их таблицам.'
+        )
+
+    def test_12_titles_cached_count(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        assert client.get(f'{self.TITLES_URL}?limit=1').json()['count'] == 2
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{self.TITLES_URL}?limit=2')
+        assert response.json()['count'] == 2
+        assert not [query for query in context.captured_queries
+                    if 'COUNT(' in query['sql']], (
+            f'Проверьте, что количество в ответе `{self.TITLES_URL}` '
+            'берется из кэша без COUNT(*) на каждую страницу.'
+        )
+
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        })
+        assert client.get(f'{self.TITLES_URL}?limit=3').json()['count'] == 3, (
+            'Проверьте, что закэшированное количество сбрасывается при '
+            'добавлении произведения.'
+        )
+        response = client.get(f'{self.TITLES_URL}?year={titles[0]["year"]}')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что для отфильтрованного списка возвращается '
+            'точное количество.'
+        )
+
+    def test_13_titles_facets(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+
+        response = client.get(
+            f'{self.TITLES_URL}?facets=genre,category,year&year=1984'
+        )
+        assert response.status_code == HTTPStatus.OK
+        facets = response.json().get('facets')
+        assert facets, (
+            f'Проверьте, что параметр `facets` добавляет в ответ '
+            f'`{self.TITLES_URL}` ключ `facets`.'
+        )
+        assert facets['year'] == [{'year': 1984, 'count': 1}]
+        assert facets['category'] == [dict(categories[0], count=1)], (
+            'Проверьте, что фасет `category` учитывает текущие фильтры.'
+        )
+        assert sorted(item['slug'] for item in facets['genre']) == sorted(
+            titles[0]['genre']
+        )
+
+        facets = client.get(f'{self.TITLES_URL}?facets=year').json()['facets']
+        assert list(facets) == ['year'] and len(facets['year']) == 2
+
+        response = client.get(f'{self.TITLES_URL}?facets=author')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что для неизвестного фасета возвращается ответ со '
+            'статусом 400.'
+        )
+
+    def test_14_titles_ordering_and_top(self, client, admin_client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLES_URL + '{title_id}/reviews/'
+        admin_client.post(url.format(title_id=titles[0]['id']),
+                          data={'text': 'Отзыв', 'score': 4})
+        admin_client.post(url.format(title_id=titles[1]['id']),
+                          data={'text': 'Отзыв', 'score': 9})
+        user_client.post(url.format(title_id=titles[1]['id']),
+                         data={'text': 'Отзыв', 'score': 6})
+
+        data = client.get(f'{self.TITLES_URL}?ordering=-rating').json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что параметр `ordering=-rating` сортирует '
+            'произведения по убыванию рейтинга.'
+        )
+        data = client.get(f'{self.TITLES_URL}?ordering=year').json()
+        assert [title['year'] for title in data['results']] == [1984, 1988]
+        data = client.get(f'{self.TITLES_URL}?min_rating=5').json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id']
+        ], (
+            'Проверьте, что параметр `min_rating` отбирает произведения '
+            'с рейтингом не ниже заданного.'
+        )
+
+        data = client.get(f'{self.TITLES_URL}top/?limit=1').json()
+        assert data['results'][0]['rating'] == 7.5
+        assert data['next'], (
+            f'Проверьте, что `{self.TITLES_URL}top/` разбит на страницы '
+            'курсорной пагинацией.'
+        )
+        data = client.get(data['next']).json()
+        assert [title['id'] for title in data['results']] == [
+            titles[0]['id']
+        ]
+        assert data['next'] is None
+
+    def test_15_titles_bulk_create(self, admin_client, user_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = [
+            {'name': 'Первое', 'year': 2001,
+             'genre': [genres[0]['slug'], genres[1]['slug']],
+             'category': categories[0]['slug']},
+            {'name': 'Ошибочное', 'year': 2001, 'genre': ['unknown'],
+             'category': categories[0]['slug']},
+            {'name': 'Второе', 'year': 2002, 'genre': [genres[2]['slug']],
+             'category': categories[1]['slug'], 'description': 'Описание'},
+        ]
+        response = user_client.post(self.TITLES_URL, data=json.dumps(data),
+                                    content_type='application/json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.TITLES_URL,
+                                         data=json.dumps(data),
+                                         content_type='application/json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{self.TITLES_URL}` '
+            'с массивом произведений возвращает ответ со статусом 201.'
+        )
+        result = response.json()
+        assert [title['name'] for title in result['created']] == [
+            'Первое', 'Второе'
+        ]
+        assert [title['slug'] for title in result['created'][0]['genre']] \
+            == sorted([genres[0]['slug'], genres[1]['slug']])
+        assert [error['index'] for error in result['errors']] == [1], (
+            'Проверьте, что ошибки массового создания возвращаются по '
+            'индексам элементов, а корректные произведения создаются.'
+        )
+        assert not [query for query in context.captured_queries
+                    if query['sql'].startswith('INSERT INTO "reviews_genre'
+                                               'title"')][1:], (
+            'Проверьте, что связи произведений с жанрами создаются одним '
+            'запросом.'
+        )
+
+        insert_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "reviews_title"')
+        ]
+        assert len(insert_queries) == 1, (
+            'Проверьте, что произведения из массива создаются одним '
+            'запросом bulk_create.'
+        )
+        query_counts = []
+        for size in (2, 5):
+            many = [dict(data[0], name=f'Пакет {size}-{number}')
+                    for number in range(size)]
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(self.TITLES_URL,
+                                             data=json.dumps(many),
+                                             content_type='application/json')
+            assert response.status_code == HTTPStatus.CREATED
+            query_counts.append(len(context.captured_queries))
+            created = response.json()['created']
+            assert [title['name'] for title in created] == [
+                item['name'] for item in many
+            ]
+            assert all(title['genre'] == result['created'][0]['genre']
+                       for title in created), (
+                'Проверьте, что жанры связываются с созданными '
+                'произведениями.'
+            )
+        assert query_counts[0] == query_counts[1], (
+            'Проверьте, что число запросов массового создания не зависит '
+            'от количества произведений.'
+        )
+
+        ndjson = '\n'.join(json.dumps(item) for item in data[2:])
+        response = admin_client.post(self.TITLES_URL, data=ndjson,
+                                     content_type='application/x-ndjson')
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что массовое создание принимает тело в формате '
+            'NDJSON.'
+        )
+        assert admin_client.get(self.TITLES_URL).json()['count'] == 10
+
+        item = json.dumps({**data[0], 'name': float('nan')})
+        for body, content_type in ((f'[{item}]', 'application/json'),
+                                   (item, 'application/x-ndjson')):
+            response = admin_client.post(self.TITLES_URL, data=body,
+                                         content_type=content_type)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что NaN отклоняется и в JSON, и в NDJSON.'
+            )
+
+    def test_16_titles_batch_by_ids(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        ids = [titles[1]['id'], 0, titles[0]['id']]
+        url = f'{self.TITLES_URL}?ids={",".join(map(str, ids))}'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что параметр `ids` возвращает существующие '
+            'произведения в переданном порядке.'
+        )
+        assert len([query for query in context.captured_queries
+                    if 'FROM "reviews_title"' in query['sql']]) == 1, (
+            'Проверьте, что произведения по списку id выбираются одним '
+            'запросом.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?ids=1,abc')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(
+            f'{self.TITLES_URL}?ids={",".join(map(str, range(1, 102)))}'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что количество id в параметре `ids` ограничено.'
+        )
+        response = client.get(f'{self.TITLES_URL}?ids=99999999999999999999')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что id вне диапазона 64-битного целого в параметре '
+            '`ids` возвращают ответ со статусом 400.'
+        )
+        response = client.get(
+            f'{self.TITLES_URL}?ids=-1,{titles[0]["id"]},0'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert [title['id'] for title in response.json()] == [
+            titles[0]['id']
+        ], 'Проверьте, что неположительные id в параметре `ids` пропускаются.'
+        response = client.get(f'{self.TITLES_URL}?ids=-1')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == []
+
+    def test_17_titles_sparse_fieldsets(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{self.TITLES_URL}?fields=id,name,rating')
+        assert response.status_code == HTTPStatus.OK
+        result = response.json()['results'][0]
+        assert set(result) == {'id', 'name', 'rating'}, (
+            'Проверьте, что параметр `fields` ограничивает поля ответа.'
+        )
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'reviews_genretitle' not in sql, (
+            'Проверьте, что без поля `genre` связи с жанрами не '
+            'предзагружаются.'
+        )
+        assert '"reviews_title"."description"' not in sql, (
+            'Проверьте, что столбцы неиспользуемых полей не выбираются.'
+        )
+
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/?omit=description,genre'
+        data = client.get(url).json()
+        assert 'description' not in data and 'genre' not in data
+        assert data['category']['slug'] == titles[0]['category']
+
+        response = client.get(f'{self.TITLES_URL}?fields=id,secret')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что для неизвестного поля возвращается ответ со '
+            'статусом 400.'
+        )
+        response = client.get(
+            f'{self.TITLES_URL}?fields=id,secret&omit=bogus'
+        )
+        assert response.json() == {
+            'fields': ['Неизвестное поле: secret.'],
+            'omit': ['Неизвестное поле: bogus.'],
+        }, (
+            'Проверьте, что неизвестные поля указываются под тем '
+            'параметром, в котором они переданы.'
+        )
+        response = client.get(f'{self.TITLES_URL}?fields=id&omit=bogus')
+        assert list(response.json()) == ['omit']
+
+        with mock.patch.object(SparseFieldsetMixin, 'get_sparse_fieldset',
+                               autospec=True) as get_sparse_fieldset:
+            client.get(f'{self.TITLES_URL}?year=1')
+            client.get(f'{self.TITLES_URL}{titles[0]["id"]}/')
+        assert not get_sparse_fieldset.called, (
+            'Проверьте, что без параметров `fields` и `omit` поля '
+            'сериализатора и выборки не перебираются.'
+        )
+
+    def test_18_titles_list_matches_detail(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+
+        results = client.get(f'{self.TITLES_URL}?ordering=year').json()[
+            'results'
+        ]
+        for title, result in zip(titles, results):
+            detail = client.get(f'{self.TITLES_URL}{title["id"]}/').json()
+            assert list(result.items()) == list(detail.items()), (
+                f'Проверьте, что список `{self.TITLES_URL}` выводит '
+                'произведения так же, как детальный ответ.'
+            )
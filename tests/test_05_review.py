@@ -1,7 +1,16 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
+
+from api.mixins import NestedListMixin
+from reviews.models import Title
 
 from tests.utils import (
     check_fields, check_pagination, create_reviews, create_single_review,
@@ -413,3 +422,163 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        assert admin_client.get(title_url).json().get('rating') == 5, (
+            'Проверьте, что рейтинг произведения равен средней оценке '
+            'его отзывов.'
+        )
+
+        admin_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+            data={'score': 8}
+        )
+        assert admin_client.get(title_url).json().get('rating') == 6, (
+            'Проверьте, что после изменения оценки отзыва рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            )
+        )
+        assert admin_client.get(title_url).json().get('rating') == 5, (
+            'Проверьте, что после удаления отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        cache.clear()
+        assert admin_client.get(title_url).json().get('rating') is None
+        call_command('rebuild_ratings', stdout=StringIO())
+        assert admin_client.get(title_url).json().get('rating') == 5, (
+            'Проверьте, что команда `rebuild_ratings` восстанавливает '
+            'рейтинги произведений и сбрасывает закэшированные ответы.'
+        )
+
+    def test_08_reviews_cursor_pagination(self, client, admin_client, admin,
+                                          user_client, user,
+                                          moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        response = client.get(f'{url}?cursor=&limit=2')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data and len(data['results']) == 2, (
+            f'Проверьте, что параметр `cursor` включает для `{url}` '
+            'курсорную пагинацию.'
+        )
+        assert data['next'], (
+            'Проверьте, что при курсорной пагинации ответ содержит ссылку на '
+            'следующую страницу.'
+        )
+        ids = [review['id'] for review in data['results']]
+
+        data = client.get(data['next']).json()
+        ids += [review['id'] for review in data['results']]
+        assert data['next'] is None
+        assert ids == [review['id'] for review in reversed(reviews)], (
+            'Проверьте, что курсорная пагинация возвращает все отзывы '
+            'от новых к старым без повторов.'
+        )
+
+    def test_09_duplicate_review_rejected_by_constraint(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        create_single_review(admin_client, titles[0]['id'], 'Первый', 6)
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data={'text': 'Второй',
+                                                    'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {
+            'non_field_errors': ['Not applied many review']
+        }
+        assert not [query for query in context.captured_queries
+                    if query['sql'].startswith('SELECT')
+                    and 'FROM "reviews_review"' in query['sql']], (
+            'Проверьте, что повторный отзыв отклоняется уникальным '
+            'ограничением без предварительного запроса.'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_count, title.rating) == (1, 6)
+
+    def test_10_reviews_list_query_count(self, client, admin_client, admin,
+                                         user_client, user,
+                                         moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == 3
+        assert len(context.captured_queries) == 2, (
+            f'Проверьте, что список отзывов `{url}` загружается одним '
+            'запросом страницы и одним запросом количества, вместе с '
+            'авторами и без отдельной проверки произведения.'
+        )
+
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что для произведения без отзывов возвращается '
+            'пустой список.'
+        )
+        response = client.get(self.REVIEWS_URL_TEMPLATE.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что для несуществующего произведения возвращается '
+            'ответ со статусом 404.'
+        )
+
+        with pytest.raises(ImproperlyConfigured):
+            type('NoParent', (NestedListMixin,), {})
+
+    def test_11_reviews_sparse_fieldsets(self, client, admin_client, admin,
+                                         user_client, user):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}?omit=text,author')
+        assert response.status_code == HTTPStatus.OK
+        assert set(response.json()['results'][0]) == {
+            'id', 'score', 'pub_date', 'comment_count'
+        }, 'Проверьте, что параметр `omit` исключает поля из ответа.'
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'users_user' not in sql, (
+            'Проверьте, что без поля `author` авторы не загружаются.'
+        )
+
+        data = client.get(f'{url}?cursor=&fields=id&limit=1').json()
+        assert set(data['results'][0]) == {'id'} and data['next'], (
+            'Проверьте, что выборочные поля работают с курсорной пагинацией.'
+        )
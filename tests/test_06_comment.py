@@ -1,6 +1,12 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
 
 from tests.utils import (check_fields, check_pagination, create_comments,
                          create_reviews, create_single_comment)
@@ -366,3 +372,85 @@ class Test06CommentAPI:
             f'Проверьте, что PUT-запрос к `{self.COMMENT_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_08_comments_list_query_count(self, client, admin_client, admin,
+                                          user_client, user,
+                                          moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == 3
+        assert len(context.captured_queries) == 2, (
+            f'Проверьте, что список комментариев `{url}` загружается одним '
+            'запросом страницы и одним запросом количества, вместе с '
+            'авторами и без отдельной проверки отзыва.'
+        )
+
+        response = client.get(self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[1]['id'], review_id=reviews[0]['id']
+        ))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв другого произведения не возвращает '
+            'комментарии и отвечает статусом 404.'
+        )
+
+    def test_09_comment_and_review_counters(self, admin_client, admin,
+                                            user_client, user,
+                                            moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+
+        assert admin_client.get(review_url).json().get('comment_count') == 3, (
+            f'Проверьте, что ответ `{review_url}` содержит количество '
+            'комментариев в поле `comment_count`.'
+        )
+        assert admin_client.get(title_url).json().get('review_count') == 3, (
+            f'Проверьте, что ответ `{title_url}` содержит количество '
+            'отзывов в поле `review_count`.'
+        )
+
+        admin_client.delete(f'{review_url}comments/{comments[0]["id"]}/')
+        admin_client.patch(review_url, data={'text': 'Новый текст'})
+        assert admin_client.get(review_url).json()['comment_count'] == 2, (
+            'Проверьте, что удаление комментария уменьшает счетчик отзыва, '
+            'а изменение отзыва не перезаписывает его.'
+        )
+
+        admin_client.delete(f'{title_url}reviews/{reviews[1]["id"]}/')
+        assert admin_client.get(title_url).json()['review_count'] == 2, (
+            'Проверьте, что удаление отзыва уменьшает счетчик произведения.'
+        )
+
+        Review.objects.update(comment_count=0)
+        call_command('rebuild_counters', stdout=StringIO())
+        assert admin_client.get(review_url).json()['comment_count'] == 2, (
+            'Проверьте, что команда `rebuild_counters` восстанавливает '
+            'количество комментариев.'
+        )
+
+    def test_10_values_output_matches_serializers(self, admin_client, admin,
+                                                  user_client, user):
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        stdout = StringIO()
+        call_command('benchmark_serializers', rows=10, repeat=1,
+                     stdout=stdout)
+        assert 'comments: 2' in stdout.getvalue(), (
+            'Проверьте, что вывод списков через `.values()` совпадает с '
+            'выводом сериализаторов.'
+        )
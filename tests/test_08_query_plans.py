@@ -0,0 +1,81 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.utils import create_comments
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Проверка планов запросов написана для SQLite.'
+)
+@pytest.mark.django_db(transaction=True)
+class Test08QueryPlans:
+
+    def get_page_query(self, client, url, table):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        for query in context.captured_queries:
+            sql = query['sql']
+            if (sql.startswith('SELECT') and f'FROM "{table}"' in sql
+                    and 'ORDER BY' in sql):
+                return sql
+        assert False, (
+            f'Не найден запрос страницы к таблице `{table}` для `{url}`.'
+        )
+
+    def test_01_list_endpoints_use_indexes(self, admin_client, admin,
+                                           user_client, user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        endpoints = (
+            ('/api/v1/categories/', 'reviews_category'),
+            ('/api/v1/genres/', 'reviews_genre'),
+            ('/api/v1/titles/', 'reviews_title'),
+            (f'/api/v1/titles/?year={titles[0]["year"]}', 'reviews_title'),
+            (f'/api/v1/titles/?name={titles[0]["name"]}', 'reviews_title'),
+            ('/api/v1/titles/?ordering=year', 'reviews_title'),
+            ('/api/v1/titles/?ordering=rating', 'reviews_title'),
+            ('/api/v1/titles/?ordering=-rating', 'reviews_title'),
+            ('/api/v1/titles/top/', 'reviews_title'),
+            (f'/api/v1/titles/{title_id}/reviews/', 'reviews_review'),
+            (f'/api/v1/titles/{title_id}/reviews/?cursor=',
+             'reviews_review'),
+            (f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}'
+             '/comments/', 'reviews_comment'),
+            ('/api/v1/users/', 'users_user'),
+        )
+        for url, table in endpoints:
+            sql = self.get_page_query(admin_client, url, table)
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            full_scan = any(
+                step.startswith('SCAN') and 'INDEX' not in step
+                for step in plan
+            )
+            temp_sort = any('USE TEMP B-TREE' in step for step in plan)
+            assert not (full_scan and temp_sort), (
+                f'Проверьте индексы для `{url}`: основной запрос читает '
+                f'таблицу целиком и сортирует во временной таблице: {plan}'
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_02_descending_rating_index_keeps_nulls_last():
+    index = next(index for index in Title._meta.indexes
+                 if index.name == 'title_rating_desc_idx')
+    with connection.schema_editor(collect_sql=True) as editor:
+        with mock.patch.object(type(editor.connection), 'vendor',
+                               'postgresql'):
+            sql = str(index.create_sql(Title, editor))
+    assert '"rating" DESC NULLS LAST, "id" DESC' in sql, (
+        'Проверьте, что на PostgreSQL индекс для `?ordering=-rating` '
+        'совпадает с сортировкой `rating DESC NULLS LAST, id DESC`.'
+    )
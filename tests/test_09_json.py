@@ -0,0 +1,125 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+DATA = {
+    'pub_date': datetime.datetime(
+        2022, 3, 4, 5, 6, 7, 123456, tzinfo=datetime.timezone.utc
+    ),
+    'naive': datetime.datetime(2022, 3, 4, 5, 6, 7),
+    'date': datetime.date(2022, 3, 4),
+    'time': datetime.time(5, 6, 7, 890),
+    'rating': Decimal('7.50'),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'floats': [0.1, 1.0, 1e16, 1e-7, -2.5e-300, 1e-05, 1.234e-05,
+               -9.99e-05, 1e-4],
+    'ints': [0, -1, 2 ** 63, 2 ** 70],
+    'text': 'Привет мир  "кавычки" \\ \x00 \U0001f600',
+    'lazy': gettext_lazy('lazy'),
+    1: 'int key',
+    'nested': [{'b': 1, 'a': [None, True, False]}],
+}
+
+
+class Test09JSON:
+
+    @pytest.mark.parametrize('data', [
+        DATA,
+        {'floats': [1.5, 3.0]},
+        {'rating': 1e-05, 'floats': [1.234e-05, -9.99e-05, 1e-4]},
+        [timezone.now(), 'тест '],
+        {'count': 2, 'results': []},
+        {'form': QueryDict('a=1&a=2'), 'ordered': OrderedDict(b=1, a=2)},
+    ])
+    def test_01_renderer_output_matches(self, data):
+        if 'ordered' in data:
+            data['ordered'].move_to_end('b')
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data
+        ), 'Проверьте, что FastJSONRenderer выводит то же, что JSONRenderer.'
+
+    def test_02_renderer_indent_and_fallback(self, monkeypatch):
+        media_type = 'application/json; indent=2'
+        assert FastJSONRenderer().render(DATA, media_type) == (
+            JSONRenderer().render(DATA, media_type)
+        ), 'Проверьте, что FastJSONRenderer учитывает отступы из запроса.'
+        assert FastJSONRenderer().render(None) == b''
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == JSONRenderer().render(
+            DATA
+        ), 'Проверьте, что без orjson используется стандартный модуль.'
+
+    @pytest.mark.parametrize('content', [
+        '{"name": "\\u0418\\u043c\\u044f", "year": 2000}',
+        '{"text": "Привет", "genre": ["a", "b"]}',
+        '[1, 2.5, 1e400, 123456789012345678901234567890]',
+        '{"id": -9223372036854775809, "min": -9223372036854775808}',
+        '{"surrogate": "\\ud800"}',
+    ])
+    def test_03_parser_output_matches(self, content):
+        content = content.encode()
+        assert FastJSONParser().parse(BytesIO(content)) == (
+            JSONParser().parse(BytesIO(content))
+        ), 'Проверьте, что FastJSONParser разбирает тело как JSONParser.'
+
+    @pytest.mark.parametrize('content', ['{"a": NaN}', '{"a": ', ''])
+    def test_04_parser_errors_match(self, content, monkeypatch):
+        content = content.encode()
+        for module in (parsers.orjson, None):
+            monkeypatch.setattr(parsers, 'orjson', module)
+            with pytest.raises(ParseError) as fast:
+                FastJSONParser().parse(BytesIO(content))
+            with pytest.raises(ParseError) as default:
+                JSONParser().parse(BytesIO(content))
+            assert str(fast.value) == str(default.value), (
+                'Проверьте, что ошибки FastJSONParser совпадают с ошибками '
+                'JSONParser.'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_api_uses_fast_json(self, admin_client):
+        response = admin_client.post(
+            '/api/v1/categories/',
+            data='{"name": "Фильмы", "slug": "films"}',
+            content_type='application/json',
+        )
+        assert response.status_code == 201
+        assert response.content == JSONRenderer().render(response.data), (
+            'Проверьте, что ответы API кодируются FastJSONRenderer '
+            'так же, как JSONRenderer.'
+        )
+        assert isinstance(
+            response.renderer_context['view'].request.parsers[0],
+            FastJSONParser
+        )
+
+    @pytest.mark.parametrize('data', [
+        {'rating': float('nan')},
+        {'results': [{'rating': None}, {'rating': float('inf')}]},
+        [None, (-float('inf'),)],
+        {'form': OrderedDict(rating=float('nan'))},
+        {'rating': Decimal('NaN')},
+    ])
+    def test_06_renderer_rejects_non_finite(self, data):
+        with pytest.raises(ValueError) as default:
+            JSONRenderer().render(data)
+        with pytest.raises(ValueError) as fast:
+            FastJSONRenderer().render(data)
+        assert str(fast.value) == str(default.value), (
+            'Проверьте, что FastJSONRenderer, как и JSONRenderer, не '
+            'выводит NaN и Infinity как null.'
+        )
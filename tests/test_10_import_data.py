@@ -0,0 +1,121 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from api.authentication import get_token_version
+from reviews.models import Comment, Review, Title, User
+
+CSV_DIR = os.path.join(settings.BASE_DIR, 'static/data')
+
+
+def read_csv(filename):
+    with open(os.path.join(CSV_DIR, filename), encoding='utf-8') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def import_data(**options):
+    stdout = StringIO()
+    call_command('import_data', stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ImportData:
+
+    def assert_csv_dates(self, model, filename):
+        expected = {int(row['id']): parse_datetime(row['pub_date'])
+                    for row in read_csv(filename)}
+        stored = dict(model.objects.values_list('id', 'pub_date'))
+        assert stored == expected, (
+            f'Проверьте, что импорт сохраняет `pub_date` из `{filename}`.'
+        )
+
+    def test_01_bulk_keeps_csv_dates(self):
+        import_data(bulk=True)
+        assert Title.objects.count() == len(read_csv('titles.csv'))
+        self.assert_csv_dates(Review, 'review.csv')
+        self.assert_csv_dates(Comment, 'comments.csv')
+
+    @pytest.mark.parametrize('first_run', [{}, {'bulk': True}])
+    def test_02_upsert_is_idempotent(self, first_run):
+        import_data(**first_run)
+        output = import_data(upsert=True, prune=True)
+        assert 'обновлено 0 строк' in output
+        for line in output.splitlines():
+            assert 'обновлено' not in line or 'обновлено 0 строк' in line, (
+                'Проверьте, что повторный --upsert с теми же CSV не '
+                f'обновляет строки: {line}'
+            )
+            assert 'удалено' not in line or 'удалено 0 строк' in line, (
+                'Проверьте, что --prune не удаляет строки из CSV: '
+                f'{line}'
+            )
+        self.assert_csv_dates(Review, 'review.csv')
+        self.assert_csv_dates(Comment, 'comments.csv')
+
+    def test_03_upsert_updates_and_prunes(self, django_user_model):
+        import_data(bulk=True)
+        review = Review.objects.order_by('id').first()
+        Review.objects.filter(id=review.id).update(text='Изменено')
+        extra = Review.objects.create(
+            title_id=review.title_id, text='Нет в CSV', score=5,
+            author=django_user_model.objects.create(
+                username='not_in_csv', email='not_in_csv@yamdb.fake'
+            ),
+        )
+        output = import_data(upsert=True, prune=True)
+        assert 'обновлено 1 строк' in output, (
+            'Проверьте, что --upsert обновляет измененные строки.'
+        )
+        assert not Review.objects.filter(id=extra.id).exists(), (
+            'Проверьте, что --prune удаляет строки, которых нет в CSV.'
+        )
+        assert Review.objects.get(id=review.id).text != 'Изменено'
+
+    def test_04_upsert_role_change_revokes_tokens(self):
+        import_data(bulk=True)
+        row = next(row for row in read_csv('users.csv')
+                   if row['role'] == 'user')
+        user_id = int(row['id'])
+        User.objects.filter(id=user_id).update(role='admin')
+        version = get_token_version(user_id)
+        import_data(upsert=True)
+        assert User.objects.get(id=user_id).role == 'user'
+        assert get_token_version(user_id) == version + 1, (
+            'Проверьте, что смена роли через --upsert делает '
+            'недействительными выданные токены пользователя.'
+        )
+        assert not User.objects.exclude(id=user_id).filter(
+            token_version__gt=0
+        ).exists(), (
+            'Проверьте, что токены пользователей без смены роли остаются '
+            'действительными.'
+        )
+
+
+@pytest.mark.django_db
+class Test10ImportDataWorkers:
+
+    def test_01_single_worker_runs_in_caller_transaction(self):
+        import_data(bulk=True, workers=1)
+        assert Review.objects.count() == len(read_csv('review.csv')), (
+            'Проверьте, что с `--workers 1` таблицы загружаются в текущем '
+            'соединении и транзакции.'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Откат на один поток проверяется на SQLite.'
+    )
+    def test_02_sqlite_falls_back_to_single_worker(self):
+        output = import_data(bulk=True, workers=3)
+        assert 'SQLite не поддерживает параллельную запись' in output, (
+            'Проверьте, что на SQLite `--workers` сбрасывается до 1.'
+        )
+        assert Comment.objects.count() == len(read_csv('comments.csv'))